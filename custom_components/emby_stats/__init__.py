@@ -3,40 +3,164 @@ import logging
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.const import Platform, CONF_HOST, CONF_API_KEY
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
-from .emby_api import EmbyApiClient
-from .coordinator import EmbyStatsCoordinator
+from .aggregate import EmbyAggregateCoordinator
+from .analytics import EmbyAnalyticsCoordinator, analytics_storage_key
+from .const import (
+    DOMAIN,
+    POSTER_CACHE,
+    CONF_POSTER_CACHE_SIZE,
+    DEFAULT_POSTER_CACHE_SIZE,
+    STORAGE_VERSION,
+    CONF_MEMBERS,
+    CONF_ENABLE_ANALYTICS,
+)
+from .client_registry import async_acquire_client, async_release_client, async_close_unused_client
+from .coordinator import EmbyStatsCoordinator, snapshot_storage_key
+from .poster_cache import PosterCache
+from .websocket_api import async_register_websocket_commands
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Emby Stats component."""
+    async_register_websocket_commands(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Emby integration from a config entry."""
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    if CONF_MEMBERS in entry.data:
+        return await _async_setup_aggregate_entry(hass, entry)
+
     host = entry.data[CONF_HOST]
     api_key = entry.data[CONF_API_KEY]
 
-    client = EmbyApiClient(host, api_key)
+    client = async_acquire_client(hass, host, api_key)
 
-    try:
-        await client.test_connection()
-    except Exception as e:
-        _LOGGER.error("Error testing Emby connection: %s", e)
-        return False
+    poster_cache = await _async_get_poster_cache(hass, entry)
+    coordinator = EmbyStatsCoordinator(hass, client, entry, poster_cache)
+    entry.async_on_unload(poster_cache.async_add_listener(coordinator.async_handle_poster_cached))
+    if await coordinator.async_restore():
+        # Start from the saved snapshot; the refresh also proves the server is reachable
+        entry.async_create_background_task(hass, coordinator.async_refresh(), "emby_stats first refresh")
+    else:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            await async_release_client(hass, client)
+            raise
 
-    coordinator = EmbyStatsCoordinator(hass, client, entry)
-    await coordinator.async_config_entry_first_refresh()
+    if entry.options.get(CONF_ENABLE_ANALYTICS, False):
+        coordinator.analytics = EmbyAnalyticsCoordinator(hass, client, entry)
+        await coordinator.analytics.async_restore()
+        # The first scan of a large library takes a while, never block setup on it
+        entry.async_create_background_task(hass, coordinator.analytics.async_refresh(), "emby_stats analytics")
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    coordinator.async_start_push()
+    # Combined entries set up before this server start following it now
+    for aggregate in list(hass.data[DOMAIN].values()):
+        if isinstance(aggregate, EmbyAggregateCoordinator) and entry.entry_id in aggregate.member_ids:
+            aggregate.async_attach(entry.entry_id, coordinator)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     return True
 
 
+async def _async_setup_aggregate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up an entry combining the stats of several server entries."""
+    coordinator = EmbyAggregateCoordinator(hass, entry)
+    for entry_id, member in coordinator.members().items():
+        coordinator.async_attach(entry_id, member)
+    try:
+        await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        coordinator.async_detach()
+        raise
+
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    return True
+
+
+async def _async_get_poster_cache(hass: HomeAssistant, entry: ConfigEntry) -> PosterCache:
+    """Return the poster cache shared by all entries, loading it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (poster_cache := domain_data.get(POSTER_CACHE)) is None:
+        poster_cache = domain_data[POSTER_CACHE] = PosterCache(hass, _poster_cache_quota([entry]))
+        await poster_cache.async_load()
+    else:
+        await _async_update_poster_quota(hass, entry)
+    return poster_cache
+
+
+def _poster_cache_quota(entries: list[ConfigEntry]) -> int:
+    """Return the largest poster cache size of the given entries in bytes."""
+    return max(
+        entry.options.get(CONF_POSTER_CACHE_SIZE, DEFAULT_POSTER_CACHE_SIZE) for entry in entries
+    ) * 1024 * 1024
+
+
+async def _async_update_poster_quota(hass: HomeAssistant, entry: ConfigEntry | None = None) -> None:
+    """Fit the shared poster cache to the loaded server entries plus the one being set up.
+
+    All entries write to the same folder, so the largest quota wins. It is
+    recomputed on every setup and unload, so a lowered size applies at once.
+    """
+    domain_data = hass.data[DOMAIN]
+    if (poster_cache := domain_data.get(POSTER_CACHE)) is None:
+        return
+    entries = [
+        loaded
+        for entry_id, coordinator in domain_data.items()
+        if isinstance(coordinator, EmbyStatsCoordinator)
+        and (loaded := hass.config_entries.async_get_entry(entry_id)) is not None
+    ]
+    if entry is not None:
+        entries.append(entry)
+    if entries:
+        await poster_cache.async_set_quota(_poster_cache_quota(entries))
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the saved data and close the client of a deleted entry."""
+    await Store(hass, STORAGE_VERSION, snapshot_storage_key(entry.entry_id)).async_remove()
+    await Store(hass, STORAGE_VERSION, analytics_storage_key(entry.entry_id)).async_remove()
+    if CONF_MEMBERS not in entry.data:
+        # Unloading kept the client around for a reload that will not come
+        await async_close_unused_client(hass, entry.data[CONF_HOST], entry.data[CONF_API_KEY])
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        if isinstance(coordinator, EmbyAggregateCoordinator):
+            coordinator.async_detach()
+            return unload_ok
+        for aggregate in list(hass.data[DOMAIN].values()):
+            if isinstance(aggregate, EmbyAggregateCoordinator) and entry.entry_id in aggregate.member_ids:
+                aggregate.async_detach_member(entry.entry_id)
+        await coordinator.async_stop_push()
+        await _async_update_poster_quota(hass)
+        if coordinator.analytics is not None:
+            await coordinator.analytics.async_shutdown()
+        # A reload picks the client up again with its connections and cache intact;
+        # at shutdown it is closed right away
+        await async_release_client(hass, coordinator.client, linger=True)
     return unload_ok
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when the options flow changed it."""
+    await hass.config_entries.async_reload(entry.entry_id)
@@ -0,0 +1,152 @@
+"""Coordinator combining the data of several Emby servers."""
+import asyncio
+import heapq
+import logging
+from itertools import islice
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import DOMAIN, CONF_MEMBERS, CONF_COMPACT_ATTRIBUTES, LATEST_LIMIT, POSTER_CACHE
+from .coordinator import TOTAL_KEYS, EmbyStatsCoordinator
+from .view_model import build_views
+
+_LOGGER = logging.getLogger(__name__)
+
+# Counts of each server's primary user, summed like the totals
+SUMMED_KEYS = (*TOTAL_KEYS, "unwatched_tvshows", "unwatched_movies", "watched_tvshows", "watched_movies")
+
+# Title key shown as state for each latest list
+LATEST_TITLES = {
+    "last_tvshows_data": "last_tvshows_title",
+    "last_movies_data": "last_movies_title",
+    "last_updated_tvshows_data": "last_updated_tvshows_title",
+}
+
+
+def merge_latest_lists(lists: list[list[dict]], limit: int | None = LATEST_LIMIT) -> list[dict]:
+    """K-way merge of lists that are each sorted newest first by date_added."""
+    merged = heapq.merge(*lists, key=lambda item: item["date_added"] or "", reverse=True)
+    return list(islice(merged, limit))
+
+
+def merge_server_data(server_data: list[dict]) -> dict:
+    """Combine the coordinator data of several servers into one data dict."""
+    data = {key: sum(entry.get(key) or 0 for entry in server_data) for key in SUMMED_KEYS}
+    data["users"] = {}
+    for list_key, title_key in LATEST_TITLES.items():
+        # Series are deduplicated by the view, so keep every updated series
+        limit = None if list_key == "last_updated_tvshows_data" else LATEST_LIMIT
+        items = merge_latest_lists([entry.get(list_key) or [] for entry in server_data], limit)
+        data[list_key] = items
+        data[title_key] = items[0]["title"] if items else "None"
+    if stale := [entry["stale_since"] for entry in server_data if entry.get("stale_since")]:
+        data["stale_since"] = min(stale)
+    return data
+
+
+class EmbyAggregateCoordinator(DataUpdateCoordinator):
+    """Coordinator summing the stats of several Emby Stats server entries.
+
+    Every member entry keeps polling its own server with its own pooled
+    client; the combined data is rebuilt whenever one of them updates. A
+    manual refresh refreshes all members concurrently. Members that fail
+    keep contributing their last data.
+    """
+
+    def __init__(self, hass, config_entry):
+        self.member_ids = list(config_entry.data[CONF_MEMBERS])
+        self.compact_attributes = config_entry.options.get(CONF_COMPACT_ATTRIBUTES, False)
+        self._unsubscribe = {}
+        self._refreshing = False
+        super().__init__(hass, _LOGGER, name=f"{DOMAIN} aggregate", update_interval=None)
+
+    def members(self) -> dict[str, EmbyStatsCoordinator]:
+        """Return the coordinators of the member entries that are loaded."""
+        domain_data = self.hass.data.get(DOMAIN, {})
+        return {
+            entry_id: domain_data[entry_id]
+            for entry_id in self.member_ids
+            if isinstance(domain_data.get(entry_id), EmbyStatsCoordinator)
+        }
+
+    @callback
+    def async_attach(self, entry_id: str, member: EmbyStatsCoordinator) -> None:
+        """Follow the updates of a member coordinator, replacing an earlier one."""
+        if unsubscribe := self._unsubscribe.pop(entry_id, None):
+            unsubscribe()
+        self._unsubscribe[entry_id] = member.async_add_listener(self._handle_member_update)
+        if self.data is not None and member.data is not None:
+            self._handle_member_update()
+
+    @callback
+    def async_detach(self) -> None:
+        """Stop following all member coordinators."""
+        for unsubscribe in self._unsubscribe.values():
+            unsubscribe()
+        self._unsubscribe.clear()
+
+    @callback
+    def async_detach_member(self, entry_id: str) -> None:
+        """Stop following an unloaded member and report it as unavailable."""
+        if unsubscribe := self._unsubscribe.pop(entry_id, None):
+            unsubscribe()
+        if self.data is None:
+            return
+        if (data := self._merge()) is None:
+            # No member is left to merge; keep the last sums but flag every server
+            data = {
+                **self.data,
+                "servers": {
+                    member_id: {**server, "available": False}
+                    for member_id, server in self.data["servers"].items()
+                },
+            }
+        self.async_set_updated_data(data)
+
+    @callback
+    def _handle_member_update(self) -> None:
+        if self._refreshing:
+            return
+        if (data := self._merge()) is not None:
+            self.async_set_updated_data(data)
+
+    def _merge(self) -> dict | None:
+        members = self.members()
+        available = {entry_id: member for entry_id, member in members.items() if member.data is not None}
+        if not available:
+            return None
+        data = merge_server_data([member.data for member in available.values()])
+        data["servers"] = {}
+        for entry_id in self.member_ids:
+            # Members that are not loaded, for example after a failed setup, are unavailable too
+            entry = self.hass.config_entries.async_get_entry(entry_id)
+            member = members.get(entry_id)
+            data["servers"][entry_id] = {
+                "title": entry.title if entry is not None else entry_id,
+                "available": (
+                    entry_id in available
+                    and member.last_update_success
+                    and not member.data.get("stale_since")
+                ),
+            }
+        data["views"] = build_views(data, self.compact_attributes, self.hass.data.get(DOMAIN, {}).get(POSTER_CACHE))
+        return data
+
+    async def _async_update_data(self):
+        """Refresh all member servers concurrently and combine their data."""
+        members = self.members()
+        self._refreshing = True
+        try:
+            await asyncio.gather(*(member.async_refresh() for member in members.values()))
+        finally:
+            self._refreshing = False
+
+        if (data := self._merge()) is None:
+            raise UpdateFailed("None of the combined Emby servers has data yet")
+        for entry_id, server in data["servers"].items():
+            if entry_id not in members:
+                _LOGGER.warning("Emby server %s is not loaded", server["title"])
+            elif not server["available"]:
+                _LOGGER.warning("Emby server %s is unavailable, using its last data", server["title"])
+        return data
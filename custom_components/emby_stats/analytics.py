@@ -0,0 +1,419 @@
+"""Incrementally maintained library analytics: runtime, size, genres and resolution."""
+import base64
+import logging
+from array import array
+from collections import Counter
+
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    CONF_USER_ID,
+    CONF_USER_IDS,
+    CONF_TV_LIBRARY_ID,
+    CONF_MOVIE_LIBRARY_ID,
+    STORAGE_VERSION,
+    ANALYTICS_INTERVAL,
+    ANALYTICS_PAGE_SIZE,
+    ANALYTICS_SAVE_DELAY,
+    ANALYTICS_CLOCK_SKEW,
+    ANALYTICS_TOP_GENRES,
+)
+from .emby_api import EmbyApiClient, EmbyApiError
+
+_LOGGER = logging.getLogger(__name__)
+
+TICKS_PER_HOUR = 10_000_000 * 3600
+
+RESOLUTIONS = ("Unknown", "SD", "720p", "1080p", "4K")
+
+
+def resolution_class(width: int | None, height: int | None) -> int:
+    """Return the index in RESOLUTIONS of a video size."""
+    width, height = width or 0, height or 0
+    if width >= 3200 or height >= 2000:
+        return 4
+    if width >= 1800 or height >= 1000:
+        return 3
+    if width >= 1200 or height >= 700:
+        return 2
+    if width or height:
+        return 1
+    return 0
+
+
+def analytics_storage_key(entry_id: str) -> str:
+    """Return the storage key of an entry's analytics index."""
+    return f"{DOMAIN}.{entry_id}.analytics"
+
+
+def _encode(values: array | bytearray) -> str:
+    return base64.b64encode(values).decode()
+
+
+def _decode(typecode: str, encoded: str) -> array:
+    values = array(typecode)
+    values.frombytes(base64.b64decode(encoded))
+    return values
+
+
+class LibraryIndex:
+    """Column-oriented per-item index with aggregates kept up to date.
+
+    Every item is one row across a set of typed arrays, so 150k items take a
+    few megabytes. Removing an item moves the last row into its place. The
+    genres of a row point into a table of distinct genre combinations, and
+    every user has a bytearray with a played flag per row. ``version`` goes
+    up with every change, so unchanged indices need not be saved.
+    """
+
+    def __init__(self):
+        self.ids: list[str] = []
+        self._rows: dict[str, int] = {}
+        self.library = array("B")
+        self.runtime = array("q")  # ticks
+        self.size = array("q")  # bytes
+        self.resolution = array("B")
+        self.genre_set = array("I")
+        self.genre_sets: list[tuple[str, ...]] = [()]
+        self._genre_set_ids: dict[tuple[str, ...], int] = {(): 0}
+        self.played: dict[str, bytearray] = {}
+        self.version = 0
+        self._reset_aggregates()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _reset_aggregates(self) -> None:
+        self.total_runtime = 0
+        self.total_size = 0
+        self.library_counts = Counter()
+        self.genre_counts = Counter()
+        self.resolution_counts = Counter()
+        self.watched_runtime = dict.fromkeys(self.played, 0)
+
+    def _account(self, row: int, sign: int) -> None:
+        """Add a row to the aggregates, or take it out with sign=-1."""
+        runtime = self.runtime[row]
+        self.total_runtime += sign * runtime
+        self.total_size += sign * self.size[row]
+        self.library_counts[self.library[row]] += sign
+        self.resolution_counts[self.resolution[row]] += sign
+        for genre in self.genre_sets[self.genre_set[row]]:
+            self.genre_counts[genre] += sign
+        for user_id, flags in self.played.items():
+            if flags[row]:
+                self.watched_runtime[user_id] += sign * runtime
+
+    def _genre_set_id(self, genres: tuple[str, ...]) -> int:
+        if (set_id := self._genre_set_ids.get(genres)) is None:
+            set_id = self._genre_set_ids[genres] = len(self.genre_sets)
+            self.genre_sets.append(genres)
+        return set_id
+
+    def upsert(self, item_id: str, library: int, runtime: int, size: int, resolution: int, genres: tuple[str, ...]) -> None:
+        """Add an item or replace the values of a known one."""
+        genre_set = self._genre_set_id(genres)
+        if (row := self._rows.get(item_id)) is not None:
+            if (self.library[row], self.runtime[row], self.size[row], self.resolution[row], self.genre_set[row]) == (
+                library, runtime, size, resolution, genre_set
+            ):
+                return
+            self._account(row, -1)
+            self.library[row] = library
+            self.runtime[row] = runtime
+            self.size[row] = size
+            self.resolution[row] = resolution
+            self.genre_set[row] = genre_set
+        else:
+            row = self._rows[item_id] = len(self.ids)
+            self.ids.append(item_id)
+            self.library.append(library)
+            self.runtime.append(runtime)
+            self.size.append(size)
+            self.resolution.append(resolution)
+            self.genre_set.append(genre_set)
+            for flags in self.played.values():
+                flags.append(0)
+        self._account(row, 1)
+        self.version += 1
+
+    def remove(self, item_id: str) -> bool:
+        """Remove an item; return False when it was not indexed."""
+        if (row := self._rows.pop(item_id, None)) is None:
+            return False
+        self._account(row, -1)
+        last = len(self.ids) - 1
+        columns = (self.library, self.runtime, self.size, self.resolution, self.genre_set, *self.played.values())
+        if row != last:
+            moved = self.ids[row] = self.ids[last]
+            self._rows[moved] = row
+            for column in columns:
+                column[row] = column[last]
+        self.ids.pop()
+        for column in columns:
+            column.pop()
+        self.version += 1
+        return True
+
+    def set_played(self, user_id: str, item_id: str, played: bool) -> None:
+        """Set the played flag of an indexed item for a user."""
+        if (row := self._rows.get(item_id)) is None:
+            return
+        if (flags := self.played.get(user_id)) is None:
+            flags = self.played[user_id] = bytearray(len(self.ids))
+            self.watched_runtime[user_id] = 0
+        if flags[row] != played:
+            flags[row] = played
+            self.watched_runtime[user_id] += self.runtime[row] if played else -self.runtime[row]
+            self.version += 1
+
+    def clear_played(self, user_id: str) -> None:
+        """Mark every item as unplayed for a user."""
+        self.played[user_id] = bytearray(len(self.ids))
+        self.watched_runtime[user_id] = 0
+        self.version += 1
+
+    def library_ids(self, library: int) -> set[str]:
+        """Return the IDs of the indexed items of a library."""
+        return {item_id for item_id, item_library in zip(self.ids, self.library) if item_library == library}
+
+    def as_dict(self) -> dict:
+        return {
+            "ids": self.ids,
+            "library": _encode(self.library),
+            "runtime": _encode(self.runtime),
+            "size": _encode(self.size),
+            "resolution": _encode(self.resolution),
+            "genre_set": _encode(self.genre_set),
+            "genre_sets": self.genre_sets,
+            "played": {user_id: _encode(flags) for user_id, flags in self.played.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LibraryIndex":
+        index = cls()
+        index.ids = list(data["ids"])
+        index._rows = {item_id: row for row, item_id in enumerate(index.ids)}
+        index.library = _decode("B", data["library"])
+        index.runtime = _decode("q", data["runtime"])
+        index.size = _decode("q", data["size"])
+        index.resolution = _decode("B", data["resolution"])
+        index.genre_set = _decode("I", data["genre_set"])
+        index.genre_sets = [tuple(genres) for genres in data["genre_sets"]]
+        index._genre_set_ids = {genres: set_id for set_id, genres in enumerate(index.genre_sets)}
+        index.played = {user_id: bytearray(base64.b64decode(flags)) for user_id, flags in data["played"].items()}
+        index._reset_aggregates()
+        for row in range(len(index.ids)):
+            index._account(row, 1)
+        return index
+
+
+class EmbyAnalyticsCoordinator(DataUpdateCoordinator):
+    """Keep library analytics up to date with a cost proportional to churn.
+
+    The first run pages through every movie and episode once; later runs only
+    fetch items saved, and user data changed, since the previous run. The
+    index is persisted so restarts do not rescan the library.
+    """
+
+    def __init__(self, hass, client: EmbyApiClient, config_entry):
+        self.client = client
+        self.user_ids = list(config_entry.data.get(CONF_USER_IDS) or [config_entry.data[CONF_USER_ID]])
+        self.user_id = self.user_ids[0]
+        self._libraries = list(dict.fromkeys((
+            config_entry.data[CONF_TV_LIBRARY_ID], config_entry.data[CONF_MOVIE_LIBRARY_ID]
+        )))
+        self.index = LibraryIndex()
+        self._marks = {}
+        self._user_marks = {}
+        self._rescan = True
+        self._saved_version = None
+        super().__init__(hass, _LOGGER, name=f"{DOMAIN} analytics", update_interval=ANALYTICS_INTERVAL)
+        self._store = Store(hass, STORAGE_VERSION, analytics_storage_key(config_entry.entry_id))
+
+    async def async_restore(self) -> bool:
+        """Load the persisted index; return False if there is none."""
+        stored = await self._store.async_load()
+        if not stored or stored.get("libraries") != self._libraries:
+            return False
+        self.index = await self.hass.async_add_executor_job(LibraryIndex.from_dict, stored["index"])
+        self._marks = stored["marks"]
+        self._user_marks = stored["user_marks"]
+        self._rescan = False
+        self._saved_version = self.index.version
+        self.data = self._summary()
+        _LOGGER.debug("Restored Emby analytics index with %s items", len(self.index))
+        return True
+
+    def _snapshot(self) -> dict:
+        return {
+            "libraries": self._libraries,
+            "marks": self._marks,
+            "user_marks": self._user_marks,
+            "index": self.index.as_dict(),
+        }
+
+    @callback
+    def _async_save_changes(self) -> None:
+        """Schedule a save when the index changed since the previous one."""
+        # Marks that moved without changes are not worth rewriting the index
+        # for; after a restart they only cause some items to be fetched again
+        if self.index.version != self._saved_version:
+            self._saved_version = self.index.version
+            self._store.async_delay_save(self._snapshot, ANALYTICS_SAVE_DELAY)
+
+    @callback
+    def async_remove_items(self, item_ids: list[str]) -> None:
+        """Drop deleted items reported by the Emby websocket."""
+        if any([self.index.remove(item_id) for item_id in item_ids]):
+            self._async_save_changes()
+            self.async_set_updated_data(self._summary())
+
+    async def _async_index_pages(self, index: LibraryIndex, library: int, pages) -> str | None:
+        """Upsert every item of a paged query; return the newest DateLastSaved seen."""
+        newest = None
+        async for page in pages:
+            for dto in page:
+                index.upsert(
+                    dto["Id"],
+                    library,
+                    dto.get("RunTimeTicks") or 0,
+                    dto.get("Size") or 0,
+                    resolution_class(dto.get("Width"), dto.get("Height")),
+                    tuple(dto.get("Genres") or ()),
+                )
+                if (saved := dto.get("DateLastSaved")) and (newest is None or saved > newest):
+                    newest = saved
+        return newest
+
+    async def _async_full_scan(self) -> None:
+        """Rebuild the index from scratch; the old one is served until it is done."""
+        _LOGGER.debug("Scanning Emby libraries for analytics")
+        index = LibraryIndex()
+        marks = {}
+        for library, library_id in enumerate(self._libraries):
+            pages = self.client.iter_analytics_pages(self.user_id, library_id, page_size=ANALYTICS_PAGE_SIZE)
+            marks[library_id] = await self._async_index_pages(index, library, pages)
+
+        user_marks = {}
+        for user_id in self.user_ids:
+            user_marks[user_id] = await self._async_scan_played(index, user_id)
+
+        self.index, self._marks, self._user_marks = index, marks, user_marks
+        self._rescan = False
+        self._saved_version = None
+        _LOGGER.debug("Indexed %s Emby items for analytics", len(index))
+
+    async def _async_scan_played(self, index: LibraryIndex, user_id: str) -> str:
+        """Set the played flags of a user from scratch; return the user's next mark."""
+        mark = self._user_mark()
+        index.clear_played(user_id)
+        async for page in self.client.iter_played_pages(user_id, page_size=ANALYTICS_PAGE_SIZE):
+            for dto in page:
+                index.set_played(user_id, dto["Id"], True)
+        return mark
+
+    async def _async_apply_item_changes(self) -> None:
+        """Apply the items saved since the previous run."""
+        for library, library_id in enumerate(self._libraries):
+            pages = self.client.iter_analytics_pages(
+                self.user_id, library_id, self._marks.get(library_id), ANALYTICS_PAGE_SIZE
+            )
+            if newest := await self._async_index_pages(self.index, library, pages):
+                self._marks[library_id] = max(newest, self._marks.get(library_id) or "")
+
+    async def _async_mismatched_libraries(self) -> list[int]:
+        """Return the libraries whose item count differs from the server's."""
+        mismatched = []
+        for library, library_id in enumerate(self._libraries):
+            count = await self.client.get_library_count(self.user_id, library_id, "Movie,Episode", use_cache=False)
+            if count != self.index.library_counts[library]:
+                mismatched.append(library)
+        return mismatched
+
+    async def _async_remove_deleted(self, library: int) -> bool:
+        """Remove the items the server no longer has; return False if it has unknown ones."""
+        indexed = self.index.library_ids(library)
+        complete = True
+        pages = self.client.iter_item_id_pages(self.user_id, self._libraries[library], ANALYTICS_PAGE_SIZE)
+        async for page in pages:
+            for dto in page:
+                if dto["Id"] not in indexed:
+                    complete = False
+                indexed.discard(dto["Id"])
+        for item_id in indexed:
+            self.index.remove(item_id)
+        return complete
+
+    async def _async_incremental_update(self) -> None:
+        """Apply items and user data changed since the previous run."""
+        await self._async_apply_item_changes()
+
+        for user_id in self.user_ids:
+            if user_id not in self._user_marks:
+                # A user added after the scan only needs their played items
+                self._user_marks[user_id] = await self._async_scan_played(self.index, user_id)
+                continue
+            mark, self._user_marks[user_id] = self._user_marks[user_id], self._user_mark()
+            async for page in self.client.iter_played_pages(user_id, mark, ANALYTICS_PAGE_SIZE):
+                for dto in page:
+                    self.index.set_played(user_id, dto["Id"], bool((dto.get("UserData") or {}).get("Played")))
+
+        # Deletions missed while the websocket was down only show up as a count mismatch
+        if not await self._async_mismatched_libraries():
+            return
+        # Items added after the delta ran are not missing; another delta finds them
+        await self._async_apply_item_changes()
+        for library in await self._async_mismatched_libraries():
+            _LOGGER.debug("Emby analytics library %s is out of sync, comparing item IDs", self._libraries[library])
+            if not await self._async_remove_deleted(library):
+                _LOGGER.debug("Emby analytics index misses items, rescanning")
+                self._rescan = True
+
+    @staticmethod
+    def _user_mark() -> str:
+        """Return where the next user data query starts, allowing for clock skew."""
+        return (dt_util.utcnow() - ANALYTICS_CLOCK_SKEW).isoformat()
+
+    def _summary(self) -> dict:
+        index = self.index
+        return {
+            "item_count": len(index),
+            "runtime_hours": round(index.total_runtime / TICKS_PER_HOUR, 1),
+            "size_bytes": index.total_size,
+            "genres": {
+                genre: count
+                for genre, count in index.genre_counts.most_common(ANALYTICS_TOP_GENRES)
+                if count > 0
+            },
+            "genre_count": sum(1 for count in index.genre_counts.values() if count > 0),
+            "resolutions": {
+                RESOLUTIONS[resolution]: count
+                for resolution, count in sorted(index.resolution_counts.items())
+                if count > 0
+            },
+            "watched_hours": {
+                user_id: round(index.watched_runtime.get(user_id, 0) / TICKS_PER_HOUR, 1)
+                for user_id in self.user_ids
+            },
+        }
+
+    async def _async_update_data(self):
+        """Scan the libraries once, then apply changes incrementally."""
+        try:
+            if self._rescan:
+                await self._async_full_scan()
+            else:
+                await self._async_incremental_update()
+                if self._rescan:
+                    await self._async_full_scan()
+        except EmbyApiError as err:
+            _LOGGER.error("Error updating Emby analytics: %s", err)
+            raise UpdateFailed(f"Error updating Emby analytics: {err}")
+
+        self._async_save_changes()
+        return self._summary()
@@ -0,0 +1,58 @@
+"""Circuit breaker guarding requests to an Emby server."""
+import time
+
+from .const import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT
+
+
+class CircuitBreaker:
+    """Stop sending requests to a server that keeps failing.
+
+    After failure_threshold consecutive failures the circuit opens and
+    requests are refused for reset_timeout seconds. Then a single trial
+    request is let through and the period starts over: success closes the
+    circuit, failure keeps it open.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a trial request through."""
+        if self._opened_at is None:
+            return 0
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0)
+
+    def allow_request(self) -> bool:
+        """Return True when a request may be sent now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            self._opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
@@ -0,0 +1,86 @@
+"""Registry that shares one Emby API client per server."""
+from functools import partial
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN, CLIENTS, CLIENT_LINGER
+from .emby_api import EmbyApiClient
+
+
+def _client_key(host: str, api_key: str) -> tuple[str, str]:
+    return host.rstrip('/').lower(), api_key
+
+
+@callback
+def async_acquire_client(hass: HomeAssistant, host: str, api_key: str) -> EmbyApiClient:
+    """Return the shared client for a server and take a reference to it.
+
+    Entries pointing at the same server share one pooled session, request
+    coalescing and response cache. Every acquire needs a matching release.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (clients := domain_data.get(CLIENTS)) is None:
+        clients = domain_data[CLIENTS] = {}
+        # Entries are not unloaded at shutdown, so their releases never close the clients
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, partial(_async_close_all, hass))
+    key = _client_key(host, api_key)
+    if key not in clients:
+        clients[key] = [EmbyApiClient(host, api_key), 0, None]
+    elif (cancel_close := clients[key][2]) is not None:
+        # Picked up again before the lingering close
+        cancel_close()
+        clients[key][2] = None
+    clients[key][1] += 1
+    return clients[key][0]
+
+
+async def async_release_client(hass: HomeAssistant, client: EmbyApiClient, linger: bool = False) -> None:
+    """Drop a reference to a shared client and close it when it was the last one.
+
+    With linger the last reference keeps the client open for a while, so an
+    entry set up right after the config flow or a reload reuses its
+    connections and cached responses. Home Assistant shutting down always
+    closes the client right away.
+    """
+    clients = hass.data.get(DOMAIN, {}).get(CLIENTS, {})
+    for key, (shared_client, references, _cancel_close) in list(clients.items()):
+        if shared_client is client:
+            if references > 1:
+                clients[key][1] -= 1
+                return
+            if linger and not hass.is_stopping:
+                clients[key][1] = 0
+                clients[key][2] = async_call_later(hass, CLIENT_LINGER, partial(_async_close_unused, hass, key))
+                return
+            del clients[key]
+            break
+    await client.async_close()
+
+
+async def async_close_unused_client(hass: HomeAssistant, host: str, api_key: str) -> None:
+    """Close a lingering client that no entry uses any more."""
+    clients = hass.data.get(DOMAIN, {}).get(CLIENTS, {})
+    key = _client_key(host, api_key)
+    if (entry := clients.get(key)) is not None and entry[1] == 0:
+        entry[2]()
+        del clients[key]
+        await entry[0].async_close()
+
+
+async def _async_close_all(hass: HomeAssistant, _event: Event) -> None:
+    """Close every shared client, in use or lingering, when Home Assistant closes."""
+    clients = hass.data.get(DOMAIN, {}).pop(CLIENTS, {})
+    for client, _references, cancel_close in clients.values():
+        if cancel_close is not None:
+            cancel_close()
+        await client.async_close()
+
+
+@callback
+def _async_close_unused(hass: HomeAssistant, key: tuple[str, str], _now) -> None:
+    clients = hass.data.get(DOMAIN, {}).get(CLIENTS, {})
+    if (entry := clients.get(key)) is not None and entry[1] == 0:
+        del clients[key]
+        hass.async_create_task(entry[0].async_close())
@@ -1,45 +1,132 @@
 """Config flow for Emby Library Stats."""
+import asyncio
 import logging
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_HOST, CONF_API_KEY
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+import homeassistant.helpers.config_validation as cv
 
-from .const import DOMAIN, CONF_USER_ID, CONF_TV_LIBRARY_ID, CONF_MOVIE_LIBRARY_ID
+from .const import (
+    DOMAIN,
+    CONF_USER_ID,
+    CONF_USER_IDS,
+    CONF_USER_NAMES,
+    CONF_TV_LIBRARY_ID,
+    CONF_MOVIE_LIBRARY_ID,
+    CONF_MEMBERS,
+    CONF_MAX_PARALLEL_REQUESTS,
+    DEFAULT_MAX_PARALLEL_REQUESTS,
+    CONF_ENABLE_WEBSOCKET,
+    CONF_POSTER_CACHE_SIZE,
+    DEFAULT_POSTER_CACHE_SIZE,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_ENABLE_ANALYTICS,
+    CONF_LOG_TIMINGS,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+)
+from .client_registry import async_acquire_client, async_release_client
 from .emby_api import EmbyApiClient, EmbyApiError
 
 _LOGGER = logging.getLogger(__name__)
 
 
+async def _async_discover(client: EmbyApiClient) -> tuple[dict[str, str], dict[str, str]]:
+    """Fetch the users and libraries of a server concurrently.
+
+    A successful answer also proves the host and API key are valid.
+    """
+    users, libraries = await asyncio.gather(client.get_users(), client.get_libraries())
+    return users, libraries
+
+
+def _monitoring_data(user_input: dict, user_options: dict[str, str]) -> dict:
+    """Return the entry data for the selected users and libraries."""
+    return {
+        # The first selected user also runs the library-wide queries
+        CONF_USER_IDS: user_input[CONF_USER_IDS],
+        CONF_USER_ID: user_input[CONF_USER_IDS][0],
+        CONF_USER_NAMES: {user_id: user_options[user_id] for user_id in user_input[CONF_USER_IDS]},
+        CONF_TV_LIBRARY_ID: user_input[CONF_TV_LIBRARY_ID],
+        CONF_MOVIE_LIBRARY_ID: user_input[CONF_MOVIE_LIBRARY_ID],
+    }
+
+
 class EmbyStatsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle the Emby Stats configuration flow."""
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> "EmbyStatsOptionsFlow":
+        return EmbyStatsOptionsFlow()
+
     async def async_step_user(self, user_input=None) -> FlowResult:
+        # Once there are several servers they can also be combined
+        if len(self._server_entries()) >= 2:
+            return self.async_show_menu(step_id="user", menu_options=["server", "aggregate"])
+        return await self.async_step_server(user_input)
+
+    def _server_entries(self) -> dict[str, str]:
+        """Return the titles of the single-server entries by entry ID."""
+        return {
+            entry.entry_id: entry.title
+            for entry in self._async_current_entries()
+            if CONF_MEMBERS not in entry.data
+        }
+
+    async def async_step_aggregate(self, user_input=None) -> FlowResult:
+        """Combine the stats of several server entries into one set of sensors."""
+        errors: dict[str, str] = {}
+        servers = self._server_entries()
+
+        if user_input is not None:
+            if len(user_input[CONF_MEMBERS]) < 2:
+                errors[CONF_MEMBERS] = "too_few_servers"
+            else:
+                return self.async_create_entry(
+                    title=" + ".join(servers[entry_id] for entry_id in user_input[CONF_MEMBERS]),
+                    data={CONF_MEMBERS: user_input[CONF_MEMBERS]},
+                )
+
+        return self.async_show_form(
+            step_id="aggregate",
+            data_schema=vol.Schema({
+                vol.Required(CONF_MEMBERS): cv.multi_select(servers),
+            }),
+            errors=errors,
+        )
+
+    async def async_step_server(self, user_input=None) -> FlowResult:
         errors: dict[str, str] = {}
 
         if user_input is not None:
             host = user_input[CONF_HOST]
             api_key = user_input[CONF_API_KEY]
-            self.test_client = EmbyApiClient(host, api_key)
+            # The shared client stays open for the entry that is set up next
+            client = async_acquire_client(self.hass, host, api_key)
 
             try:
-                await self.test_client.test_connection()
-                self.users = await self.test_client.get_users()
-                self.libraries = await self.test_client.get_libraries()
+                self.users, self.libraries = await _async_discover(client)
             except EmbyApiError as err:
                 errors["base"] = "cannot_connect"
                 _LOGGER.error("Emby API error: %s", err)
             except Exception:
                 errors["base"] = "unknown"
+            finally:
+                await async_release_client(self.hass, client, linger=not errors)
 
             if not errors:
                 self.config_data = user_input
                 return await self.async_step_select_libraries()
 
         return self.async_show_form(
-            step_id="user",
+            step_id="server",
             data_schema=vol.Schema({
                 vol.Required(CONF_HOST): str,
                 vol.Required(CONF_API_KEY): str,
@@ -53,10 +140,10 @@ class EmbyStatsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         user_options = {v: k for k, v in self.users.items()}
         lib_options = {v: k for k, v in self.libraries.items()}
 
-        if user_input is not None:
-            self.config_data[CONF_USER_ID] = user_input[CONF_USER_ID]
-            self.config_data[CONF_TV_LIBRARY_ID] = user_input[CONF_TV_LIBRARY_ID]
-            self.config_data[CONF_MOVIE_LIBRARY_ID] = user_input[CONF_MOVIE_LIBRARY_ID]
+        if user_input is not None and not user_input[CONF_USER_IDS]:
+            errors[CONF_USER_IDS] = "no_users"
+        elif user_input is not None:
+            self.config_data.update(_monitoring_data(user_input, user_options))
 
             return self.async_create_entry(
                 title=self.config_data[CONF_HOST],
@@ -66,9 +153,95 @@ class EmbyStatsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="select_libraries",
             data_schema=vol.Schema({
-                vol.Required(CONF_USER_ID): vol.In(user_options),
+                vol.Required(CONF_USER_IDS): cv.multi_select(user_options),
                 vol.Required(CONF_TV_LIBRARY_ID): vol.In(lib_options),
                 vol.Required(CONF_MOVIE_LIBRARY_ID): vol.In(lib_options),
             }),
             errors=errors,
         )
+
+
+class EmbyStatsOptionsFlow(config_entries.OptionsFlow):
+    """Change the monitored users and libraries and the polling behaviour."""
+
+    async def async_step_init(self, user_input=None) -> FlowResult:
+        if CONF_MEMBERS in self.config_entry.data:
+            return await self.async_step_aggregate(user_input)
+        return await self.async_step_server(user_input)
+
+    async def async_step_aggregate(self, user_input=None) -> FlowResult:
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="aggregate",
+            data_schema=vol.Schema({
+                vol.Required(
+                    CONF_COMPACT_ATTRIBUTES, default=self.config_entry.options.get(CONF_COMPACT_ATTRIBUTES, False)
+                ): bool,
+            }),
+        )
+
+    async def async_step_server(self, user_input=None) -> FlowResult:
+        entry = self.config_entry
+        errors: dict[str, str] = {}
+
+        if not hasattr(self, "users"):
+            # Reuses the running entry's client, connections and cached responses
+            client = async_acquire_client(self.hass, entry.data[CONF_HOST], entry.data[CONF_API_KEY])
+            try:
+                self.users, self.libraries = await _async_discover(client)
+            except EmbyApiError as err:
+                _LOGGER.error("Emby API error: %s", err)
+                return self.async_abort(reason="cannot_connect")
+            finally:
+                await async_release_client(self.hass, client)
+
+        # Keep configured users selectable even if the server no longer lists them
+        user_options = {**entry.data.get(CONF_USER_NAMES, {}), **{v: k for k, v in self.users.items()}}
+        lib_options = {v: k for k, v in self.libraries.items()}
+
+        if user_input is not None:
+            if not user_input[CONF_USER_IDS]:
+                errors[CONF_USER_IDS] = "no_users"
+            elif user_input[CONF_MIN_SCAN_INTERVAL] > user_input[CONF_MAX_SCAN_INTERVAL]:
+                errors[CONF_MIN_SCAN_INTERVAL] = "invalid_interval"
+            else:
+                data = {**entry.data, **_monitoring_data(user_input, user_options)}
+                options = {
+                    key: value for key, value in user_input.items()
+                    if key not in (CONF_USER_IDS, CONF_TV_LIBRARY_ID, CONF_MOVIE_LIBRARY_ID)
+                }
+                # One update, so the entry is reloaded only once
+                self.hass.config_entries.async_update_entry(entry, data=data, options=options)
+                return self.async_create_entry(data=options)
+
+        options = entry.options
+        return self.async_show_form(
+            step_id="server",
+            data_schema=vol.Schema({
+                vol.Required(
+                    CONF_USER_IDS, default=entry.data.get(CONF_USER_IDS) or [entry.data[CONF_USER_ID]]
+                ): cv.multi_select(user_options),
+                vol.Required(CONF_TV_LIBRARY_ID, default=entry.data[CONF_TV_LIBRARY_ID]): vol.In(lib_options),
+                vol.Required(CONF_MOVIE_LIBRARY_ID, default=entry.data[CONF_MOVIE_LIBRARY_ID]): vol.In(lib_options),
+                vol.Required(
+                    CONF_MIN_SCAN_INTERVAL, default=options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
+                vol.Required(
+                    CONF_MAX_SCAN_INTERVAL, default=options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
+                vol.Required(
+                    CONF_MAX_PARALLEL_REQUESTS,
+                    default=options.get(CONF_MAX_PARALLEL_REQUESTS, DEFAULT_MAX_PARALLEL_REQUESTS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+                vol.Required(CONF_ENABLE_WEBSOCKET, default=options.get(CONF_ENABLE_WEBSOCKET, False)): bool,
+                vol.Required(
+                    CONF_POSTER_CACHE_SIZE, default=options.get(CONF_POSTER_CACHE_SIZE, DEFAULT_POSTER_CACHE_SIZE)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=10000)),
+                vol.Required(CONF_COMPACT_ATTRIBUTES, default=options.get(CONF_COMPACT_ATTRIBUTES, False)): bool,
+                vol.Required(CONF_ENABLE_ANALYTICS, default=options.get(CONF_ENABLE_ANALYTICS, False)): bool,
+                vol.Required(CONF_LOG_TIMINGS, default=options.get(CONF_LOG_TIMINGS, False)): bool,
+            }),
+            errors=errors,
+        )
@@ -1,10 +1,102 @@
 """Constants for the Emby Stats integration."""
+from datetime import timedelta
 
 DOMAIN = "emby_stats"
 PLATFORMS = ["sensor"]
 
 CONF_USER_ID = "user_id"
+CONF_USER_IDS = "user_ids"
+CONF_USER_NAMES = "user_names"
 CONF_TV_LIBRARY = "tv_library"
 CONF_MOVIE_LIBRARY = "movie_library"
 CONF_TV_LIBRARY_ID = "tv_library_id"
 CONF_MOVIE_LIBRARY_ID = "movie_library_id"
+CONF_MAX_PARALLEL_REQUESTS = "max_parallel_requests"
+CONF_ENABLE_WEBSOCKET = "enable_websocket"
+CONF_POSTER_CACHE_SIZE = "poster_cache_size"
+CONF_COMPACT_ATTRIBUTES = "compact_attributes"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_LOG_TIMINGS = "log_timings"
+CONF_MEMBERS = "members"
+CONF_ENABLE_ANALYTICS = "enable_analytics"
+
+# HTTP connection pooling
+DEFAULT_TIMEOUT = 10
+MAX_CONNECTIONS_PER_HOST = 4
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+
+# Response cache shared by all entries using the same client
+CLIENTS = "clients"
+CLIENT_LINGER = 60  # seconds an unused client from the config flow stays open
+RESPONSE_CACHE_TTL = 60  # seconds
+RESPONSE_CACHE_SIZE = 128
+
+# Refresh fan-out
+DEFAULT_MAX_PARALLEL_REQUESTS = 4
+
+# Incremental refresh
+DELTA_REFRESH_INTERVAL = timedelta(minutes=5)
+FULL_REFRESH_INTERVAL = timedelta(minutes=30)
+DELTA_LIMIT = 100
+LATEST_LIMIT = 10
+SERIES_SCAN_MAX_PAGES = 20
+
+# Push updates over the Emby websocket
+WEBSOCKET_POLL_INTERVAL = timedelta(hours=1)
+WEBSOCKET_DEBOUNCE = 5
+WEBSOCKET_BACKOFF_MIN = 5
+WEBSOCKET_BACKOFF_MAX = 300
+WEBSOCKET_PLAYED_MEMORY = 1000  # played states remembered from UserDataChanged messages
+
+# Poster cache
+POSTER_CACHE = "poster_cache"
+POSTER_FOLDER = "www/emby_posters"
+POSTER_URL_PATH = "/local/emby_posters"
+POSTER_EMPTY = "empty.jpg"
+POSTER_MAX_WIDTH = 300
+POSTER_MAX_HEIGHT = 450
+POSTER_QUALITY = 85
+DEFAULT_POSTER_CACHE_SIZE = 50  # MB
+POSTER_DOWNLOAD_CONCURRENCY = 3
+POSTER_DOWNLOAD_RETRIES = 3
+POSTER_DOWNLOAD_BACKOFF = 2  # seconds
+POSTER_FAILURE_TTL = 3600  # seconds before a failed poster is requested again
+
+# Persisted snapshot of the last good data
+STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 30  # seconds
+
+# Adaptive polling (intervals in minutes)
+DEFAULT_MIN_SCAN_INTERVAL = 1
+DEFAULT_MAX_SCAN_INTERVAL = 30
+SCHEDULER_SPEEDUP = 2
+SCHEDULER_SLOWDOWN = 1.5
+SCHEDULER_JITTER = 0.1
+
+# Resilience: per-endpoint timeouts (seconds), retries and the circuit breaker
+ENDPOINT_TIMEOUTS = {
+    "Users": 10,
+    "Library/MediaFolders": 10,
+    "Items/Counts": 20,
+    "Items": 30,
+    "Images": 20,
+}
+REQUEST_RETRIES = 2
+REQUEST_BACKOFF = 0.5  # seconds, doubled per attempt
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 60  # seconds
+
+# Instrumentation: upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Library analytics
+ANALYTICS_INTERVAL = timedelta(minutes=15)
+ANALYTICS_PAGE_SIZE = 500
+ANALYTICS_SAVE_DELAY = 60  # seconds
+ANALYTICS_CLOCK_SKEW = timedelta(minutes=5)
+ANALYTICS_TOP_GENRES = 20
+
+# Config flow discovery
+USERS_PAGE_SIZE = 100
@@ -1,60 +1,604 @@
 """Data Update Coordinator for the Emby Stats integration."""
+import asyncio
 import logging
+import time
+from collections import OrderedDict
 from datetime import timedelta
+from homeassistant.core import callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from .const import DOMAIN, CONF_USER_ID, CONF_TV_LIBRARY_ID, CONF_MOVIE_LIBRARY_ID
-from .emby_api import EmbyApiClient, EmbyApiError
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    CONF_USER_ID,
+    CONF_USER_IDS,
+    CONF_USER_NAMES,
+    CONF_TV_LIBRARY_ID,
+    CONF_MOVIE_LIBRARY_ID,
+    CONF_MAX_PARALLEL_REQUESTS,
+    DEFAULT_MAX_PARALLEL_REQUESTS,
+    CONF_ENABLE_WEBSOCKET,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_LOG_TIMINGS,
+    WEBSOCKET_POLL_INTERVAL,
+    WEBSOCKET_DEBOUNCE,
+    WEBSOCKET_PLAYED_MEMORY,
+    STORAGE_VERSION,
+    SNAPSHOT_SAVE_DELAY,
+    DELTA_REFRESH_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    FULL_REFRESH_INTERVAL,
+    DELTA_LIMIT,
+    LATEST_LIMIT,
+)
+from .emby_api import EmbyApiClient, EmbyApiError, EmbyItem
+from .metrics import collect_timings
+from .poster_cache import PosterCache
+from .scheduler import AdaptiveInterval
+from .view_model import LATEST_VIEWS, build_views
+from .websocket import EmbyWebSocketListener
 
 _LOGGER = logging.getLogger(__name__)
 
+TOTAL_KEYS = ("total_tvshows", "total_movies", "total_episodes")
+
+# Collection types that can only hold the item types their name suggests
+SINGLE_TYPE_COLLECTIONS = {
+    "movies", "tvshows", "music", "musicvideos", "homevideos",
+    "books", "photos", "boxsets", "playlists", "livetv",
+}
+
+USER_COUNT_KEYS = ("unwatched_tvshows", "unwatched_movies")
+
+
+def counts_match_libraries(library_types: dict, tv_library_id: str, movie_library_id: str) -> bool:
+    """Return True when server-wide item counts equal the configured libraries' counts.
+
+    That holds when the configured TV and movie libraries are the only folders
+    that can contain series, episodes or movies.
+    """
+    if any(ctype not in SINGLE_TYPE_COLLECTIONS for ctype in library_types.values()):
+        return False
+    tv_folders = {lib_id for lib_id, ctype in library_types.items() if ctype == "tvshows"}
+    movie_folders = {lib_id for lib_id, ctype in library_types.items() if ctype == "movies"}
+    return tv_folders == {tv_library_id} and movie_folders == {movie_library_id}
+
+
+def merge_latest(current: list[dict], changed: list[dict], limit: int = LATEST_LIMIT) -> list[dict]:
+    """Merge changed items into a 'latest' list, newest first.
+
+    An item that is already listed keeps its most recent date_added.
+    """
+    merged = {item["id"]: item for item in current}
+    for item in changed:
+        existing = merged.get(item["id"])
+        if existing is None or (item["date_added"] or "") >= (existing["date_added"] or ""):
+            merged[item["id"]] = item
+    return sorted(merged.values(), key=lambda x: x["date_added"] or "", reverse=True)[:limit]
+
+
+def data_changed(old: dict | None, new: dict) -> bool:
+    """Return True when a refresh found new items or changed counts."""
+    if old is None:
+        return True
+    if new is old:
+        return False
+    if any(old.get(key) != new.get(key) for key in (*TOTAL_KEYS, "users")):
+        return True
+    return any(
+        [(item["id"], item["date_added"]) for item in old.get(key) or []]
+        != [(item["id"], item["date_added"]) for item in new.get(key) or []]
+        for key in LATEST_VIEWS
+    )
+
+
+def snapshot_storage_key(entry_id: str) -> str:
+    """Return the storage key of an entry's data snapshot."""
+    return f"{DOMAIN}.{entry_id}"
+
+
 class EmbyStatsCoordinator(DataUpdateCoordinator):
     """Coordinator to fetch data from Emby."""
 
-    def __init__(self, hass, client: EmbyApiClient, config_entry):
+    def __init__(self, hass, client: EmbyApiClient, config_entry, poster_cache: PosterCache | None = None):
         self.client = client
-        self.user_id = config_entry.data[CONF_USER_ID]
+        self.poster_cache = poster_cache
+        # Library analytics, attached at setup when enabled
+        self.analytics = None
+        self.compact_attributes = config_entry.options.get(CONF_COMPACT_ATTRIBUTES, False)
+        self.log_timings = config_entry.options.get(CONF_LOG_TIMINGS, False)
+        self.last_refresh_duration = None
+        self.last_refresh_timings = {}
+        # The first user also runs the library-wide queries
+        self.user_ids = list(config_entry.data.get(CONF_USER_IDS) or [config_entry.data[CONF_USER_ID]])
+        self.user_id = self.user_ids[0]
+        self.user_names = dict(config_entry.data.get(CONF_USER_NAMES, {}))
         self.tv_library_id = config_entry.data[CONF_TV_LIBRARY_ID]
         self.movie_library_id = config_entry.data[CONF_MOVIE_LIBRARY_ID]
+        self._libraries = list(dict.fromkeys((self.tv_library_id, self.movie_library_id)))
+        self._use_counts_endpoint = None
+        self._marks = {}
+        self._seen_at_mark = {}
+        self._last_full_refresh = None
+        self._changed_users = set()
+        self._scheduler = AdaptiveInterval(
+            timedelta(minutes=config_entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)),
+            timedelta(minutes=config_entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)),
+            DELTA_REFRESH_INTERVAL,
+        )
+        self._push_connected = False
+        # (user ID, item ID) -> played, least recently reported first
+        self._push_played: OrderedDict[tuple[str, str], bool] = OrderedDict()
+        self._websocket = None
+        if config_entry.options.get(CONF_ENABLE_WEBSOCKET, False):
+            self._websocket = EmbyWebSocketListener(
+                client, self._handle_push_message, self._handle_push_connection
+            )
+        self._semaphore = asyncio.Semaphore(
+            config_entry.options.get(CONF_MAX_PARALLEL_REQUESTS, DEFAULT_MAX_PARALLEL_REQUESTS)
+        )
 
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(minutes=30),
+            update_interval=self._scheduler.current,
+        )
+        self._push_debouncer = Debouncer(
+            hass, _LOGGER, cooldown=WEBSOCKET_DEBOUNCE, immediate=False, function=self.async_refresh
+        )
+        self._store = Store(hass, STORAGE_VERSION, snapshot_storage_key(config_entry.entry_id))
+
+    async def async_restore(self) -> bool:
+        """Load the last saved snapshot as stale data; return False if there is none.
+
+        A snapshot of other libraries or users, saved before the options
+        changed, is discarded.
+        """
+        snapshot = await self._store.async_load()
+        if not snapshot or not snapshot.get("data"):
+            return False
+        if snapshot.get("libraries") != self._libraries or snapshot.get("user_ids") != self.user_ids:
+            _LOGGER.debug("Ignoring Emby snapshot of other libraries or users")
+            return False
+        data = snapshot["data"]
+        data["stale_since"] = snapshot["saved_at"]
+        data["views"] = self._build_views(data)
+        self.data = data
+        _LOGGER.debug("Restored Emby data saved at %s", snapshot["saved_at"])
+        return True
+
+    def _snapshot(self, data: dict) -> dict:
+        """Return the storable part of the coordinator data."""
+        return {
+            "saved_at": dt_util.utcnow().isoformat(),
+            "libraries": self._libraries,
+            "user_ids": self.user_ids,
+            "data": {key: value for key, value in data.items() if key not in ("views", "stale_since")},
+        }
+
+    def async_start_push(self) -> None:
+        """Start the websocket listener when push updates are enabled."""
+        if self._websocket is not None:
+            self._websocket.start(self.hass)
+
+    async def async_stop_push(self) -> None:
+        """Stop the websocket listener and any pending pushed refresh."""
+        if self._websocket is not None:
+            await self._websocket.async_stop()
+        self._push_debouncer.async_shutdown()
+
+    @callback
+    def _handle_push_connection(self, connected: bool) -> None:
+        """Fall back to regular polling while the websocket is down."""
+        self._push_connected = connected
+        self.update_interval = WEBSOCKET_POLL_INTERVAL if connected else self._scheduler.current
+        if not connected:
+            # Changes may have been missed while disconnected
+            self._push_debouncer.async_schedule_call()
+
+    @callback
+    def _handle_push_message(self, message_type: str, data: dict) -> None:
+        """Schedule a debounced refresh for a library or user data change."""
+        if message_type == "UserDataChanged":
+            if data.get("UserId") not in self.user_ids:
+                return
+            if not self._played_changed(data["UserId"], data.get("UserDataList")):
+                # Playback progress, saved every few seconds while playing, changes no counts
+                return
+            self._changed_users.add(data["UserId"])
+        elif message_type == "LibraryChanged" and data.get("ItemsRemoved"):
+            # Deletions never show up in a delta query
+            self._last_full_refresh = None
+            if self.analytics is not None:
+                self.analytics.async_remove_items(data["ItemsRemoved"])
+        # Cached responses may no longer match what changed on the server
+        self.client.invalidate_cache()
+        self._push_debouncer.async_schedule_call()
+
+    def _played_changed(self, user_id: str, user_data_list: list[dict] | None) -> bool:
+        """Return True if a UserDataChanged message may change whether items are played.
+
+        The played state of recently reported items is remembered. For other
+        items, a progress save keeps its position while marking as unplayed
+        clears it.
+        """
+        if not user_data_list:
+            return True
+        changed = False
+        for user_data in user_data_list:
+            if user_data.get("ItemId") is None or user_data.get("Played") is None:
+                continue
+            key = (user_id, user_data["ItemId"])
+            played = bool(user_data["Played"])
+            previous = self._push_played.pop(key, None)
+            self._push_played[key] = played
+            if previous is None:
+                changed |= played or not user_data.get("PlaybackPositionTicks")
+            else:
+                changed |= played != previous
+        while len(self._push_played) > WEBSOCKET_PLAYED_MEMORY:
+            self._push_played.popitem(last=False)
+        return changed
+
+    async def _async_limited(self, coro):
+        """Run a single API call within the parallel request limit."""
+        async with self._semaphore:
+            return await coro
+
+    def _previous_result(self, key: str):
+        """Return the value a sub-query produced on the last successful refresh, or None."""
+        if self.data is None:
+            return None
+        if key == "totals":
+            return {total: self.data[total] for total in TOTAL_KEYS}
+        if key.startswith("user:"):
+            if (previous_user := self.data.get("users", {}).get(key.partition(":")[2])) is None:
+                return None
+            return {count: previous_user[count] for count in USER_COUNT_KEYS}
+        return self.data.get(key)
+
+    async def _async_fetch_totals(self) -> dict:
+        """Fetch the series, movie and episode totals.
+
+        Uses the single Items/Counts request when the server-wide counts are
+        known to match the configured libraries, otherwise one query per type.
+        """
+        if self._use_counts_endpoint is None:
+            library_types = await self._async_limited(self.client.get_library_types())
+            self._use_counts_endpoint = counts_match_libraries(
+                library_types, self.tv_library_id, self.movie_library_id
+            )
+            _LOGGER.debug("Using Items/Counts for totals: %s", self._use_counts_endpoint)
+
+        if self._use_counts_endpoint:
+            try:
+                counts = await self._async_limited(self.client.get_item_counts(self.user_id))
+            except EmbyApiError as err:
+                _LOGGER.debug("Items/Counts request failed: %s", err)
+                counts = None
+            if counts is not None:
+                return {
+                    "total_tvshows": counts["Series"],
+                    "total_movies": counts["Movie"],
+                    "total_episodes": counts["Episode"],
+                }
+            _LOGGER.debug("Items/Counts not supported, falling back to per-type queries")
+            self._use_counts_endpoint = False
+
+        tv_count, movie_count, episode_count = await asyncio.gather(
+            self._async_limited(self.client.get_library_count(self.user_id, self.tv_library_id, "Series")),
+            self._async_limited(self.client.get_library_count(self.user_id, self.movie_library_id, "Movie")),
+            self._async_limited(self.client.get_library_count(self.user_id, self.tv_library_id, "Episode")),
+        )
+        return {
+            "total_tvshows": tv_count,
+            "total_movies": movie_count,
+            "total_episodes": episode_count,
+        }
+
+    async def _async_gather_queries(self, queries: dict) -> tuple[dict, list[str]]:
+        """Run independent API calls concurrently and keep those that succeed.
+
+        Failed sub-queries fall back to the value from the previous refresh
+        and are returned as the second element. The update is reported as
+        failed when every call fails, or when a failed sub-query has no
+        previous value, rather than publishing made-up zeros.
+        """
+        results = await asyncio.gather(*queries.values(), return_exceptions=True)
+        values = {}
+        errors = {}
+        for key, result in zip(queries, results):
+            if isinstance(result, EmbyApiError):
+                if (previous := self._previous_result(key)) is None:
+                    raise result
+                _LOGGER.warning("Error fetching Emby %s, keeping the previous value: %s", key, result)
+                errors[key] = result
+                values[key] = previous
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                values[key] = result
+
+        if errors and len(errors) == len(queries):
+            raise next(iter(errors.values()))
+        return values, list(errors)
+
+    def _build_data(self, totals: dict, user_counts: dict,
+                    latest_tv: list, latest_movie: list, last_updated_tvshows: list) -> dict:
+        """Assemble the coordinator data from the query results.
+
+        Users missing from user_counts keep their counts from the previous data.
+        The primary user's counts are also stored at the top level.
+        """
+        tv_count = totals["total_tvshows"]
+        movie_count = totals["total_movies"]
+        previous_users = (self.data or {}).get("users", {})
+        users = {}
+        for user_id in self.user_ids:
+            counts = user_counts.get(user_id) or previous_users[user_id]
+            users[user_id] = {
+                "unwatched_tvshows": counts["unwatched_tvshows"],
+                "unwatched_movies": counts["unwatched_movies"],
+                "watched_tvshows": max(tv_count - counts["unwatched_tvshows"], 0),
+                "watched_movies": max(movie_count - counts["unwatched_movies"], 0),
+            }
+
+        return {
+            "total_tvshows": tv_count,
+            "total_movies": movie_count,
+            **users[self.user_id],
+            "users": users,
+            "total_episodes": totals["total_episodes"],
+            "last_tvshows_title": latest_tv[0]['title'] if latest_tv else "None",
+            "last_movies_title": latest_movie[0]['title'] if latest_movie else "None",
+            "last_tvshows_data": latest_tv,
+            "last_movies_data": latest_movie,
+            "last_updated_tvshows_title": last_updated_tvshows[0]['title'] if last_updated_tvshows else "None",
+            "last_updated_tvshows_data": last_updated_tvshows,
+        }
+
+    def _full_refresh_due(self) -> bool:
+        """Return True when the delta path cannot be used or counts need reconciling."""
+        if self.data is None or self._last_full_refresh is None:
+            return True
+        if any(user_id not in self.data.get("users", {}) for user_id in self.user_ids):
+            return True
+        if any(self._marks.get(lib) is None for lib in self._libraries):
+            return True
+        return dt_util.utcnow() - self._last_full_refresh >= FULL_REFRESH_INTERVAL
+
+    def _advance_mark(self, library_id: str, items: list[EmbyItem]) -> None:
+        """Move the high-water mark of a library past the given changed items."""
+        saved = [item.date_last_saved for item in items if item.date_last_saved]
+        if not saved:
+            return
+        newest = max(saved)
+        at_newest = {item.id for item in items if item.date_last_saved == newest}
+        if self._marks.get(library_id) is None or newest > self._marks[library_id]:
+            self._marks[library_id] = newest
+            self._seen_at_mark[library_id] = at_newest
+        elif newest == self._marks[library_id]:
+            self._seen_at_mark[library_id] |= at_newest
+
+    async def _async_fetch_user_counts(self, user_id: str) -> dict:
+        """Fetch the unwatched counts of a single user."""
+        unwatched_tv, unwatched_movie = await asyncio.gather(
+            self._async_limited(self.client.get_unwatched_count(user_id, self.tv_library_id, "Series")),
+            self._async_limited(self.client.get_unwatched_count(user_id, self.movie_library_id, "Movie")),
+        )
+        return {"unwatched_tvshows": unwatched_tv, "unwatched_movies": unwatched_movie}
+
+    def _count_queries(self, user_ids=None, include_totals: bool = True) -> dict:
+        """Return the queries for the library totals and the per-user counts."""
+        queries = {}
+        if include_totals:
+            queries["totals"] = self._async_fetch_totals()
+        for user_id in self.user_ids if user_ids is None else user_ids:
+            queries[f"user:{user_id}"] = self._async_fetch_user_counts(user_id)
+        return queries
+
+    @staticmethod
+    def _user_counts(results: dict) -> dict:
+        """Extract the per-user counts from gathered query results."""
+        return {key.partition(":")[2]: value for key, value in results.items() if key.startswith("user:")}
+
+    async def _async_full_refresh(self) -> dict:
+        """Fetch all counts and latest lists and reset the high-water marks."""
+        limited = self._async_limited
+        results, failed = await self._async_gather_queries({
+            **self._count_queries(),
+            "last_tvshows_data": limited(self.client.get_latest_items(self.user_id, self.tv_library_id)),
+            "last_movies_data": limited(self.client.get_latest_items(self.user_id, self.movie_library_id)),
+            "last_updated_tvshows_data": limited(self.client.get_latest_episode_series(self.user_id, self.tv_library_id)),
+        })
+
+        # The newest item we know of marks where the next delta query starts
+        self._marks = {}
+        self._seen_at_mark = {}
+        known = {
+            self.tv_library_id: results["last_tvshows_data"] + results["last_updated_tvshows_data"],
+            self.movie_library_id: results["last_movies_data"],
+        }
+        for library_id, items in known.items():
+            dates = [item["date_added"] for item in items if item.get("date_added")]
+            if dates:
+                mark = max(dates + [self._marks.get(library_id) or ""])
+                self._marks[library_id] = mark
+                self._seen_at_mark[library_id] = {item["id"] for item in items if item.get("date_added") == mark}
+        # Values kept from before a failed sub-query still need reconciling
+        self._last_full_refresh = None if failed else dt_util.utcnow()
+
+        return self._build_data(
+            results["totals"],
+            self._user_counts(results),
+            results["last_tvshows_data"],
+            results["last_movies_data"],
+            results["last_updated_tvshows_data"],
+        )
+
+    async def _async_delta_refresh(self) -> dict:
+        """Fetch only items saved since the high-water marks and merge them in.
+
+        Returns the previous data untouched when nothing changed.
+        """
+        changes = await asyncio.gather(*(
+            self._async_limited(self.client.get_changed_items(
+                self.user_id, library_id, self._marks[library_id], DELTA_LIMIT
+            ))
+            for library_id in self._libraries
+        ))
+        if any(total > len(items) for items, total in changes):
+            _LOGGER.debug("Too many library changes for a delta refresh, reconciling fully")
+            return await self._async_full_refresh()
+
+        changed = {}
+        for library_id, (items, _total) in zip(self._libraries, changes):
+            seen = self._seen_at_mark.get(library_id, set())
+            mark = self._marks[library_id]
+            # Items at the mark come back every time; a later save means new metadata or artwork
+            changed[library_id] = [
+                item for item in items if item.id not in seen or item.date_last_saved != mark
+            ]
+            self._advance_mark(library_id, items)
+
+        changed_users, self._changed_users = self._changed_users, set()
+        if not any(changed.values()):
+            if not changed_users:
+                _LOGGER.debug("No Emby library changes since %s", self._marks)
+                return self.data
+            # Watched state changes leave the library totals untouched
+            counts, failed = await self._async_gather_queries(
+                self._count_queries(sorted(changed_users), include_totals=False)
+            )
+            if failed:
+                # Reconcile the values kept from before on the next refresh
+                self._last_full_refresh = None
+            return self._build_data(
+                {total: self.data[total] for total in TOTAL_KEYS},
+                self._user_counts(counts),
+                self.data["last_tvshows_data"],
+                self.data["last_movies_data"],
+                self.data["last_updated_tvshows_data"],
+            )
+
+        # Counts cached before the change would be stale now
+        self.client.invalidate_cache()
+        latest = {
+            self.tv_library_id: self.data["last_tvshows_data"],
+            self.movie_library_id: self.data["last_movies_data"],
+        }
+        updated_series = self.data["last_updated_tvshows_data"]
+        for library_id, items in changed.items():
+            latest[library_id] = merge_latest(
+                latest[library_id],
+                [self.client.build_latest_item(item) for item in items if item.type in ("Series", "Movie")],
+            )
+            if library_id == self.tv_library_id:
+                series = [self.client.build_series_item(item) for item in items if item.type == "Episode"]
+                updated_series = merge_latest(updated_series, [s for s in series if s is not None])
+
+        counts, failed = await self._async_gather_queries(self._count_queries())
+        if failed:
+            self._last_full_refresh = None
+        return self._build_data(
+            counts["totals"],
+            self._user_counts(counts),
+            latest[self.tv_library_id],
+            latest[self.movie_library_id],
+            updated_series,
         )
 
     async def _async_update_data(self):
-        """Fetch data from the Emby API."""
+        """Fetch data from the Emby API and record how long each endpoint took."""
+        start = time.perf_counter()
+        # Only this refresh's requests; the client may be shared with other entries
+        with collect_timings() as timings:
+            try:
+                return await self._async_fetch_data()
+            finally:
+                self.last_refresh_duration = time.perf_counter() - start
+                self.last_refresh_timings = {
+                    endpoint: (requests, seconds) for endpoint, (requests, seconds) in timings.items()
+                }
+                _LOGGER.log(
+                    logging.INFO if self.log_timings else logging.DEBUG,
+                    "Emby refresh took %.2f s: %s",
+                    self.last_refresh_duration,
+                    ", ".join(
+                        f"{endpoint} {requests}x {seconds:.2f} s"
+                        for endpoint, (requests, seconds) in sorted(
+                            self.last_refresh_timings.items(), key=lambda timing: timing[1][1], reverse=True
+                        )
+                    ) or "no requests",
+                )
+
+    async def _async_fetch_data(self) -> dict:
+        """Run a full or delta refresh, serving stale data on transient errors."""
         try:
-            tv_count = await self.client.get_library_count(self.user_id, self.tv_library_id, "Series")
-            movie_count = await self.client.get_library_count(self.user_id, self.movie_library_id, "Movie")
-            unwatched_tv = await self.client.get_unwatched_count(self.user_id, self.tv_library_id, "Series")
-            unwatched_movie = await self.client.get_unwatched_count(self.user_id, self.movie_library_id, "Movie")
-            episode_count = await self.client.get_library_count(self.user_id, self.tv_library_id, "Episode")
-
-            watched_tv = max(tv_count - unwatched_tv, 0)
-            watched_movie = max(movie_count - unwatched_movie, 0)
-
-            latest_tv = await self.client.get_latest_items(self.user_id, self.tv_library_id)
-            latest_movie = await self.client.get_latest_items(self.user_id, self.movie_library_id)
-            last_updated_tvshows = await self.client.get_latest_episode_series(self.user_id, self.tv_library_id)
-
-            return {
-                "total_tvshows": tv_count,
-                "total_movies": movie_count,
-                "unwatched_tvshows": unwatched_tv,
-                "unwatched_movies": unwatched_movie,
-                "watched_tvshows": watched_tv,
-                "watched_movies": watched_movie,
-                "total_episodes": episode_count,
-                "last_tvshows_title": latest_tv[0]['title'] if latest_tv else "None",
-                "last_movies_title": latest_movie[0]['title'] if latest_movie else "None",
-                "last_tvshows_data": latest_tv,
-                "last_movies_data": latest_movie,
-                "last_updated_tvshows_title": last_updated_tvshows[0]['title'] if last_updated_tvshows else "None",
-                "last_updated_tvshows_data": last_updated_tvshows,
-            }
+            if self._full_refresh_due():
+                data = await self._async_full_refresh()
+            else:
+                data = await self._async_delta_refresh()
+
+            if data.get("stale_since"):
+                # Fresh data again, possibly unchanged since it went stale
+                data = {key: value for key, value in data.items() if key != "stale_since"}
+
+            changed = data_changed(self.data, data)
+            if not self._push_connected:
+                self.update_interval = (
+                    self._scheduler.record_change() if changed else self._scheduler.record_idle()
+                )
+                _LOGGER.debug("Next Emby refresh in %s", self.update_interval)
+
+            if data is not self.data:
+                data["views"] = self._build_views(data)
+                self._store.async_delay_save(lambda: self._snapshot(data), SNAPSHOT_SAVE_DELAY)
+            if self.poster_cache is not None:
+                # Also for unchanged data: keeps shown posters recent and retries missing ones
+                for key in LATEST_VIEWS:
+                    self.poster_cache.prefetch(self.client, data[key][:LATEST_LIMIT])
+            return data
 
         except EmbyApiError as err:
+            if not self._push_connected:
+                self.update_interval = self._scheduler.record_failure()
+            # Changes fetched before the failure were not applied; reconcile fully
+            self._last_full_refresh = None
+            if err.transient and self.data is not None:
+                return self._stale_data(err)
             _LOGGER.error("Error fetching Emby data: %s", err)
             raise UpdateFailed(f"Error fetching Emby data: {err}")
+
+    def _stale_data(self, err: EmbyApiError) -> dict:
+        """Keep serving the last good data, marked stale, while Emby is unreachable."""
+        if self.data.get("stale_since"):
+            _LOGGER.debug("Emby still unavailable, serving stale data: %s", err)
+            return self.data
+        _LOGGER.warning("Emby unavailable, serving data from the last successful refresh: %s", err)
+        data = {**self.data, "stale_since": dt_util.utcnow().isoformat()}
+        data["views"] = self._build_views(data)
+        return data
+
+    def _build_views(self, data: dict):
+        return build_views(data, self.compact_attributes, self.poster_cache)
+
+    @callback
+    def async_handle_poster_cached(self, filename: str) -> None:
+        """Point the views at a poster that just finished downloading."""
+        if not self.data:
+            return
+        shown = {
+            PosterCache.filename(item["id"], item["image_tag"])
+            for key in LATEST_VIEWS
+            for item in self.data[key]
+            if item.get("image_tag")
+        }
+        if filename in shown:
+            self.data["views"] = self._build_views(self.data)
+            self.async_update_listeners()
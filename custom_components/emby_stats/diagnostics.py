@@ -0,0 +1,43 @@
+"""Diagnostics support for the Emby Stats integration."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_API_KEY
+from homeassistant.core import HomeAssistant
+
+from .aggregate import EmbyAggregateCoordinator
+from .const import DOMAIN
+from .coordinator import EmbyStatsCoordinator
+
+TO_REDACT = {CONF_API_KEY}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return request metrics and refresh state of a config entry."""
+    coordinator: EmbyStatsCoordinator | EmbyAggregateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    if isinstance(coordinator, EmbyAggregateCoordinator):
+        return {
+            "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+            "servers": (coordinator.data or {}).get("servers", {}),
+        }
+
+    client = coordinator.client
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": {
+            "update_interval": str(coordinator.update_interval),
+            "last_update_success": coordinator.last_update_success,
+            "last_refresh_duration": coordinator.last_refresh_duration,
+            "last_refresh_timings": {
+                endpoint: {"requests": requests, "seconds": round(seconds, 3)}
+                for endpoint, (requests, seconds) in coordinator.last_refresh_timings.items()
+            },
+            "stale_since": (coordinator.data or {}).get("stale_since"),
+        },
+        "client": {
+            "circuit_breaker": client.breaker.state,
+            "cache_hits": client.cache_hits,
+            "cache_misses": client.cache_misses,
+            "coalesced_requests": client.coalesced_requests,
+            "endpoints": client.metrics.as_dict(),
+        },
+    }
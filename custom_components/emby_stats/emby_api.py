@@ -1,18 +1,145 @@
 """Klasse voor interactie met de Emby API."""
 import aiohttp
+import asyncio
+import json
 import logging
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson wordt met Home Assistant meegeleverd
+    orjson = None
+
+from .const import (
+    DEFAULT_TIMEOUT,
+    MAX_CONNECTIONS_PER_HOST,
+    DNS_CACHE_TTL,
+    KEEPALIVE_TIMEOUT,
+    POSTER_MAX_WIDTH,
+    POSTER_MAX_HEIGHT,
+    POSTER_QUALITY,
+    SERIES_SCAN_MAX_PAGES,
+    RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_SIZE,
+    ENDPOINT_TIMEOUTS,
+    REQUEST_RETRIES,
+    REQUEST_BACKOFF,
+    USERS_PAGE_SIZE,
+)
+from .circuit_breaker import CircuitBreaker
+from .metrics import ClientMetrics
 
 _LOGGER = logging.getLogger(__name__)
 
+# Snelste beschikbare JSON-decoder
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Houdt itemantwoorden klein: alleen de primaire afbeelding en geen gebruikersdata
+_LEAN_ITEM_PARAMS = {
+    "EnableUserData": "false",
+    "EnableImageTypes": "Primary",
+    "ImageTypeLimit": "1",
+}
+
+# Velden voor de bibliotheekanalyse; RunTimeTicks wordt altijd meegestuurd
+_ANALYTICS_FIELDS = "Genres,Size,Width,Height,DateLastSaved"
+
+# Tellingen hebben alleen TotalRecordCount nodig, geen items
+_COUNT_PARAMS = {
+    "Limit": "0",
+    "EnableImages": "false",
+    "EnableUserData": "false",
+}
+
+# Statuscodes waarbij een nieuwe poging zinvol is
+_TRANSIENT_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
 class EmbyApiError(Exception):
-    """Basisuitzondering voor Emby API-fouten."""
-    pass
+    """Basisuitzondering voor Emby API-fouten.
+
+    transient geeft aan dat de fout tijdelijk is (netwerk, time-out, overbelaste
+    server) en een nieuwe poging later kan slagen.
+    """
+
+    def __init__(self, message: str, transient: bool = False):
+        super().__init__(message)
+        self.transient = transient
+
+
+class EmbyCircuitOpenError(EmbyApiError):
+    """De server faalt herhaaldelijk; aanvragen worden tijdelijk niet verstuurd."""
+
+    def __init__(self, message: str):
+        super().__init__(message, transient=True)
+
+
+def endpoint_name(path: str) -> str:
+    """Geeft de naam van het endpoint terug, zonder gebruikers-ID.
+
+    Bijvoorbeeld "Users/<id>/Items" wordt "Items".
+    """
+    parts = path.split("/")
+    if parts[0] == "Users" and len(parts) > 2:
+        return "/".join(parts[2:])
+    return path
+
+
+def _timeout(endpoint: str) -> aiohttp.ClientTimeout:
+    return aiohttp.ClientTimeout(total=ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT))
+
+
+@dataclass(frozen=True, slots=True)
+class EmbyItem:
+    """Compacte weergave van een Emby-item met alleen de velden die we gebruiken."""
+
+    id: str | None
+    type: str | None
+    name: str
+    date_created: str | None
+    date_last_saved: str | None
+    date_last_media_added: str | None
+    series_id: str | None
+    series_name: str | None
+    image_tag: str | None
+    series_image_tag: str | None
+
+    @classmethod
+    def from_dto(cls, dto: dict) -> "EmbyItem":
+        """Leest een item uit een Emby BaseItemDto."""
+        return cls(
+            id=dto.get('Id'),
+            type=dto.get('Type'),
+            name=dto.get('Name', dto.get('OriginalTitle', 'Onbekend')),
+            date_created=dto.get('DateCreated'),
+            date_last_saved=dto.get('DateLastSaved'),
+            date_last_media_added=dto.get('DateLastMediaAdded'),
+            series_id=dto.get('SeriesId'),
+            series_name=dto.get('SeriesName'),
+            image_tag=(dto.get('ImageTags') or {}).get('Primary'),
+            series_image_tag=dto.get('SeriesPrimaryImageTag'),
+        )
+
+
+def _parse_items(data: dict | None) -> list[EmbyItem]:
+    """Zet de Items uit een antwoord om naar EmbyItem-records."""
+    if not data:
+        return []
+    return [EmbyItem.from_dto(dto) for dto in data.get('Items') or ()]
 
 class EmbyApiClient:
     """Klasse voor interactie met de Emby API."""
 
-    def __init__(self, host: str, api_key: str):
-        """Initialiseer de API-client."""
+    def __init__(self, host: str, api_key: str, session: aiohttp.ClientSession | None = None):
+        """Initialiseer de API-client.
+
+        Zonder meegegeven sessie beheert de client zelf één gedeelde sessie met
+        connection pooling, keep-alive en DNS-caching. Die wordt gesloten via
+        ``async_close``; een meegegeven sessie blijft van de aanroeper.
+        """
         self._base_url = host.rstrip('/')
         self._headers = {
             "X-MediaBrowser-Token": api_key,
@@ -20,32 +147,228 @@ class EmbyApiClient:
             "X-Emby-Device-Name": "HA-Stats-Integration",
             "X-Emby-Device-Id": "ha_emby_stats_unique_id",
         }
+        self._session = session
+        self._owns_session = session is None
+        self._series_sort_supported = None
+        # (pad, parameters) -> (verloopt_op, antwoord), minst recent gebruikt eerst
+        self._cache: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self._in_flight: dict[tuple, asyncio.Task] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced_requests = 0
+        self.breaker = CircuitBreaker()
+        self.metrics = ClientMetrics()
+
+    @property
+    def cache_hit_ratio(self) -> float | None:
+        """Aandeel van de aanvragen dat uit de antwoordcache kwam."""
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else None
+
+    def invalidate_cache(self) -> None:
+        """Vergeet alle gecachete antwoorden, bijvoorbeeld na een wijzigingsmelding."""
+        self._cache.clear()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Geeft de gedeelde sessie terug en maakt die zo nodig aan."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=MAX_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._owns_session = True
+        return self._session
+
+    async def async_close(self) -> None:
+        """Sluit de sessie als deze door de client zelf is aangemaakt."""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @property
+    def websocket_url(self) -> str:
+        """Geeft de URL van de Emby-websocket terug."""
+        base = self._base_url.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+        token = self._headers.get('X-MediaBrowser-Token')
+        device_id = self._headers.get('X-Emby-Device-Id')
+        return f"{base}/embywebsocket?api_key={token}&deviceId={device_id}"
+
+    async def async_ws_connect(self) -> aiohttp.ClientWebSocketResponse:
+        """Opent een websocketverbinding via de gedeelde sessie."""
+        try:
+            return await self.session.ws_connect(self.websocket_url, headers=self._headers, heartbeat=30)
+        except (aiohttp.ClientError, aiohttp.WSServerHandshakeError) as err:
+            raise EmbyApiError(f"Websocketfout bij verbinding met {self._base_url}: {err}")
+
+    async def _async_get(self, path: str, params: dict = None, use_cache: bool = True) -> dict:
+        """Voert een GET-aanvraag uit via de antwoordcache.
+
+        Identieke aanvragen die al onderweg zijn worden samengevoegd tot één
+        aanvraag. Met use_cache=False wordt de TTL-cache overgeslagen, zowel
+        bij het lezen als bij het opslaan, maar wordt wel aangesloten bij een
+        aanvraag die al onderweg is. Gecachete
+        antwoorden worden gedeeld en mogen niet worden aangepast.
+        """
+        key = (path, tuple(sorted((params or {}).items())))
+        if use_cache:
+            # Alleen aanvragen die de cache lezen tellen mee voor de hit ratio
+            if (cached := self._cache.get(key)) is not None:
+                expires, value = cached
+                if expires > time.monotonic():
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    return value
+                del self._cache[key]
+            self.cache_misses += 1
+
+        if (task := self._in_flight.get(key)) is not None:
+            self.coalesced_requests += 1
+        else:
+            task = asyncio.ensure_future(self._async_request(path, params))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _task: self._in_flight.pop(key, None))
+        # Shield zodat een geannuleerde aanroeper de gedeelde aanvraag niet afbreekt
+        value = await asyncio.shield(task)
+
+        if use_cache:
+            self._cache[key] = (time.monotonic() + RESPONSE_CACHE_TTL, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > RESPONSE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return value
 
-    async def _async_get(self, path: str, params: dict = None) -> dict:
-        """Voert een algemene GET-aanvraag uit."""
+    async def _async_request(self, path: str, params: dict = None) -> dict:
+        """Voert een algemene GET-aanvraag uit.
+
+        Tijdelijke fouten worden een beperkt aantal keer opnieuw geprobeerd met
+        een oplopende, willekeurig gespreide wachttijd.
+        """
         url = f"{self._base_url}/emby/{path}"
+        endpoint = endpoint_name(path)
 
-        async with aiohttp.ClientSession() as session:
+        for attempt in range(REQUEST_RETRIES + 1):
             try:
-                async with session.get(url, headers=self._headers, params=params, timeout=10) as resp:
+                return _json_loads(await self._async_guarded_get(url, endpoint, params))
+            except EmbyCircuitOpenError:
+                raise
+            except EmbyApiError as err:
+                if not err.transient or attempt == REQUEST_RETRIES:
+                    raise
+                delay = REQUEST_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5)
+                _LOGGER.debug("Nieuwe poging voor %s over %.1f s: %s", path, delay, err)
+                await asyncio.sleep(delay)
+
+    async def _async_guarded_get(self, url: str, endpoint: str, params: dict = None) -> bytes:
+        """Voert één GET-aanvraag uit via de circuit breaker en geeft de body terug.
+
+        Alleen tijdelijke fouten tellen mee voor de breaker; een verkeerde
+        API-sleutel zegt niets over de belasting van de server. Duur, grootte
+        en fouten worden per endpoint bijgehouden in metrics.
+        """
+        if not self.breaker.allow_request():
+            raise EmbyCircuitOpenError(
+                f"{self._base_url} reageert niet, nieuwe poging over {self.breaker.retry_in:.0f} s"
+            )
+        try:
+            with self.metrics.measure(endpoint) as measurement:
+                async with self.session.get(url, headers=self._headers, params=params, timeout=_timeout(endpoint)) as resp:
                     if resp.status == 200:
-                        return await resp.json()
+                        result = await resp.read()
+                        measurement.bytes_received = len(result)
                     elif resp.status in (401, 403):
                         raise EmbyApiError("Onjuiste API-sleutel of geen toegang.")
                     else:
-                        raise EmbyApiError(f"API Fout: Status {resp.status} bij {url}")
-            except aiohttp.ClientError as err:
-                raise EmbyApiError(f"Netwerkfout bij verbinding met {self._base_url}: {err}")
+                        raise EmbyApiError(
+                            f"API Fout: Status {resp.status} bij {url}",
+                            transient=resp.status in _TRANSIENT_STATUSES,
+                        )
+        except EmbyApiError as err:
+            if err.transient:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            self.breaker.record_failure()
+            raise EmbyApiError(f"Netwerkfout bij verbinding met {self._base_url}: {err!r}", transient=True)
+        self.breaker.record_success()
+        return result
+
+    async def async_get_image(self, url: str) -> bytes | None:
+        """Downloadt een afbeelding via de gedeelde sessie.
+
+        Nieuwe pogingen regelt de postercache zelf.
+        """
+        return await self._async_guarded_get(url, "Images")
+
+    def _image_url(self, item_id: str, image_tag: str | None) -> str | None:
+        """Bouwt de URL van de primaire afbeelding van een item, verkleind door de server.
 
-    async def test_connection(self) -> bool:
-        """Controleert of de server bereikbaar is."""
-        await self._async_get("System/Info")
-        return True
+        De API-sleutel zit niet in de URL; async_get_image stuurt die als header mee.
+        """
+        if not image_tag:
+            return None
+        return (
+            f"{self._base_url}/emby/Items/{item_id}/Images/Primary?tag={image_tag}"
+            f"&maxWidth={POSTER_MAX_WIDTH}&maxHeight={POSTER_MAX_HEIGHT}&quality={POSTER_QUALITY}"
+        )
+
+    def build_latest_item(self, item: EmbyItem) -> dict:
+        """Zet een Emby-film of -serie om naar een item voor de 'laatst toegevoegd'-lijsten."""
+        image_url = self._image_url(item.id, item.image_tag)
+        return {
+            "title": item.name,
+            "date_added": item.date_created,
+            "image_url": image_url,
+            "image_url_original": image_url,
+            "image_tag": item.image_tag,
+            "id": item.id,
+        }
+
+    def build_series_item(self, episode: EmbyItem) -> dict | None:
+        """Zet een aflevering om naar een item voor zijn serie, of None zonder serie."""
+        series_name = episode.series_name
+        series_id = episode.series_id
+        if not series_name or not series_id:
+            return None
+        image_tag = episode.image_tag or episode.series_image_tag
+        image_url = self._image_url(series_id, image_tag)
+        return {
+            "title": series_name,
+            "date_added": episode.date_created,
+            "image_url": image_url,
+            "image_url_original": image_url,
+            "image_tag": image_tag,
+            "id": series_id,
+        }
 
     async def get_users(self) -> dict[str, str]:
-        """Haalt alle gebruikers op (Naam -> ID mapping)."""
-        data = await self._async_get("Users")
-        return {user['Name']: user['Id'] for user in data if 'Name' in user and 'Id' in user}
+        """Haalt alle gebruikers op (Naam -> ID mapping).
+
+        Gebruikt het gepagineerde Users/Query; na de eerste pagina worden de
+        overige pagina's tegelijk opgehaald. Servers zonder Users/Query vallen
+        terug op de volledige lijst van Users.
+        """
+        try:
+            first = await self._async_get("Users/Query", {"StartIndex": "0", "Limit": str(USERS_PAGE_SIZE)})
+        except EmbyApiError as err:
+            if err.transient:
+                raise
+            _LOGGER.debug("Users/Query niet ondersteund, terugval op Users: %s", err)
+            users = await self._async_get("Users")
+        else:
+            users = list(first.get('Items') or [])
+            total = first.get('TotalRecordCount', len(users))
+            pages = await asyncio.gather(*(
+                self._async_get("Users/Query", {"StartIndex": str(start), "Limit": str(USERS_PAGE_SIZE)})
+                for start in range(USERS_PAGE_SIZE, total, USERS_PAGE_SIZE)
+            ))
+            for page in pages:
+                users.extend(page.get('Items') or [])
+        return {user['Name']: user['Id'] for user in users if 'Name' in user and 'Id' in user}
 
     async def get_libraries(self) -> dict[str, str]:
         """Haalt alle bibliotheken op (Naam -> ID mapping)."""
@@ -53,17 +376,36 @@ class EmbyApiClient:
         libraries = data.get('Items', [])
         return {lib['Name']: lib['Id'] for lib in libraries if 'Name' in lib and 'Id' in lib}
 
-    async def get_library_count(self, user_id: str, library_id: str, item_type: str) -> int:
+    async def get_library_types(self) -> dict[str, str | None]:
+        """Haalt het collectietype per bibliotheek op (ID -> CollectionType)."""
+        data = await self._async_get("Library/MediaFolders")
+        libraries = data.get('Items', [])
+        return {lib['Id']: lib.get('CollectionType') for lib in libraries if 'Id' in lib}
+
+    async def get_item_counts(self, user_id: str) -> dict[str, int] | None:
+        """Haalt de totalen van series, films en afleveringen in één aanvraag op.
+
+        Geeft None terug als de server het Items/Counts-endpoint niet (volledig) ondersteunt.
+        """
+        data = await self._async_get("Items/Counts", {"UserId": user_id})
+        if not isinstance(data, dict) or not all(k in data for k in ("SeriesCount", "MovieCount", "EpisodeCount")):
+            return None
+        return {
+            "Series": data["SeriesCount"],
+            "Movie": data["MovieCount"],
+            "Episode": data["EpisodeCount"],
+        }
+
+    async def get_library_count(self, user_id: str, library_id: str, item_type: str, use_cache: bool = True) -> int:
         """Haalt het aantal items van een bepaald type op."""
         path = f"Users/{user_id}/Items"
         params = {
             "ParentId": library_id,
             "Recursive": "true",
-            "Limit": "1",
-            "Fields": "TotalRecordCount",
+            **_COUNT_PARAMS,
             "IncludeItemTypes": item_type,
         }
-        data = await self._async_get(path, params)
+        data = await self._async_get(path, params, use_cache=use_cache)
         return data.get('TotalRecordCount', 0)
 
     async def get_unwatched_count(self, user_id: str, library_id: str, item_type: str) -> int:
@@ -72,8 +414,7 @@ class EmbyApiClient:
         params = {
             "ParentId": library_id,
             "Recursive": "true",
-            "Limit": "1",
-            "Fields": "TotalRecordCount",
+            **_COUNT_PARAMS,
             "IncludeItemTypes": item_type,
             "IsPlayed": "false",
         }
@@ -90,58 +431,183 @@ class EmbyApiClient:
             "SortBy": "DateCreated",
             "SortOrder": "Descending",
             "IncludeItemTypes": "Series,Movie",
-            "Fields": "DateCreated,OriginalTitle,ImageTags",
+            "Fields": "DateCreated,OriginalTitle",
+            "EnableTotalRecordCount": "false",
+            **_LEAN_ITEM_PARAMS,
         }
         data = await self._async_get(path, params)
-        latest_items = []
-
-        if data and data.get('Items'):
-            token = self._headers.get('X-MediaBrowser-Token')
-            for item in data['Items']:
-                item_id = item.get('Id')
-                image_tag = item.get('ImageTags', {}).get('Primary')
-                image_url = f"{self._base_url}/emby/Items/{item_id}/Images/Primary?api_key={token}&tag={image_tag}&quality=90" if image_tag else None
-
-                latest_items.append({
-                    "title": item.get('Name', item.get('OriginalTitle', 'Onbekend')),
-                    "date_added": item.get('DateCreated'),
-                    "image_url": image_url,
-                    "image_url_original": image_url,
-                    "id": item_id,
-                })
-        return latest_items
+        return [self.build_latest_item(item) for item in _parse_items(data)]
 
     async def get_latest_episode_series(self, user_id: str, library_id: str, limit: int = 10) -> list[dict]:
-        """Haalt series op met hun laatst toegevoegde aflevering."""
+        """Haalt series op met hun laatst toegevoegde aflevering.
+
+        De server groepeert bij voorkeur zelf door series op DateLastContentAdded te sorteren.
+        Servers die DateLastMediaAdded niet meegeven vallen terug op een gepagineerde
+        scan van afleveringen.
+        """
+        if self._series_sort_supported is not False:
+            series = await self._get_series_by_last_content_added(user_id, library_id, limit)
+            self._series_sort_supported = series is not None
+            if series is not None:
+                return series
+        return await self._get_latest_episode_series_paged(user_id, library_id, limit)
+
+    async def _get_series_by_last_content_added(self, user_id: str, library_id: str, limit: int) -> list[dict] | None:
+        """Haalt de series met de nieuwste afleveringen in één aanvraag op, of None als dat niet kan."""
         path = f"Users/{user_id}/Items"
         params = {
             "ParentId": library_id,
             "Recursive": "true",
-            "Limit": str(limit * 5),  # extra pool voor unieke series
-            "SortBy": "DateCreated",
+            "Limit": str(limit),
+            "SortBy": "DateLastContentAdded",
             "SortOrder": "Descending",
-            "IncludeItemTypes": "Episode",
-            "Fields": "DateCreated,SeriesName,SeriesId,ImageTags",
+            "IncludeItemTypes": "Series",
+            "Fields": "DateLastMediaAdded",
+            "EnableTotalRecordCount": "false",
+            **_LEAN_ITEM_PARAMS,
         }
         data = await self._async_get(path, params)
+        items = _parse_items(data)
+        if items and not items[0].date_last_media_added:
+            return None
+
+        latest_series = []
+        for item in items:
+            if not item.date_last_media_added:
+                # Series zonder afleveringen staan achteraan
+                continue
+            series = self.build_latest_item(item)
+            series["date_added"] = item.date_last_media_added
+            latest_series.append(series)
+        return latest_series
+
+    async def _get_latest_episode_series_paged(self, user_id: str, library_id: str, limit: int) -> list[dict]:
+        """Leest afleveringen pagina voor pagina tot er 'limit' unieke series zijn."""
+        path = f"Users/{user_id}/Items"
+        page_size = limit * 2
         series_dict = {}
-        token = self._headers.get('X-MediaBrowser-Token')
 
-        if data and data.get("Items"):
-            for ep in data["Items"]:
-                series_name = ep.get("SeriesName")
-                series_id = ep.get("SeriesId")
-                if not series_name or not series_id:
-                    continue
-                if series_id not in series_dict:
-                    image_tag = ep.get("ImageTags", {}).get("Primary") or ep.get("SeriesPrimaryImageTag")
-                    image_url = f"{self._base_url}/emby/Items/{series_id}/Images/Primary?api_key={token}&tag={image_tag}&quality=90" if image_tag else None
-                    series_dict[series_id] = {
-                        "title": series_name,
-                        "date_added": ep.get("DateCreated"),
-                        "image_url": image_url,
-                        "image_url_original": image_url,
-                        "id": series_id,
-                    }
-        # Sorteer op datum toegevoegd en return maximaal 'limit' series
-        return sorted(series_dict.values(), key=lambda x: x["date_added"] or "", reverse=True)[:limit]
+        for page in range(SERIES_SCAN_MAX_PAGES):
+            params = {
+                "ParentId": library_id,
+                "Recursive": "true",
+                "StartIndex": str(page * page_size),
+                "Limit": str(page_size),
+                "SortBy": "DateCreated",
+                "SortOrder": "Descending",
+                "IncludeItemTypes": "Episode",
+                "Fields": "DateCreated",
+                "EnableTotalRecordCount": "false",
+                **_LEAN_ITEM_PARAMS,
+            }
+            data = await self._async_get(path, params)
+            episodes = _parse_items(data)
+            for ep in episodes:
+                series = self.build_series_item(ep)
+                if series is not None and series["id"] not in series_dict:
+                    series_dict[series["id"]] = series
+                    if len(series_dict) >= limit:
+                        break
+            if len(series_dict) >= limit or len(episodes) < page_size:
+                break
+
+        # Afleveringen komen nieuwste eerst binnen, dus de volgorde klopt al
+        return list(series_dict.values())[:limit]
+
+    async def get_changed_items(self, user_id: str, library_id: str, since: str, limit: int = 100) -> tuple[list[EmbyItem], int]:
+        """Haalt series, films en afleveringen op die sinds 'since' zijn opgeslagen.
+
+        Geeft de (maximaal 'limit') gewijzigde items en het totale aantal wijzigingen terug.
+        """
+        path = f"Users/{user_id}/Items"
+        params = {
+            "ParentId": library_id,
+            "Recursive": "true",
+            "Limit": str(limit),
+            "MinDateLastSaved": since,
+            "SortBy": "DateCreated",
+            "SortOrder": "Descending",
+            "IncludeItemTypes": "Series,Movie,Episode",
+            "Fields": "DateCreated,DateLastSaved,OriginalTitle",
+            **_LEAN_ITEM_PARAMS,
+        }
+        # Wijzigingen moeten altijd vers zijn
+        data = await self._async_get(path, params, use_cache=False)
+        return _parse_items(data), data.get('TotalRecordCount', 0)
+
+    async def _iter_item_pages(self, user_id: str, params: dict, page_size: int):
+        """Doorloopt alle items van een query pagina voor pagina (StartIndex/Limit).
+
+        Levert per pagina de ruwe DTO's, zodat ook een bibliotheek met
+        honderdduizenden items nooit in zijn geheel in het geheugen staat.
+        """
+        path = f"Users/{user_id}/Items"
+        start = 0
+        while True:
+            data = await self._async_get(path, {
+                **params,
+                "StartIndex": str(start),
+                "Limit": str(page_size),
+                "EnableTotalRecordCount": "false",
+            }, use_cache=False)
+            items = data.get('Items') or []
+            if items:
+                yield items
+            if len(items) < page_size:
+                return
+            start += len(items)
+
+    def iter_analytics_pages(self, user_id: str, library_id: str, since: str | None = None, page_size: int = 500):
+        """Doorloopt films en afleveringen met looptijd, grootte, genres en resolutie.
+
+        Met 'since' alleen de items die sindsdien zijn opgeslagen.
+        """
+        params = {
+            "ParentId": library_id,
+            "Recursive": "true",
+            "SortBy": "DateCreated,SortName",
+            "SortOrder": "Ascending",
+            "IncludeItemTypes": "Movie,Episode",
+            "Fields": _ANALYTICS_FIELDS,
+            "EnableImages": "false",
+            "EnableUserData": "false",
+        }
+        if since:
+            params["MinDateLastSaved"] = since
+        return self._iter_item_pages(user_id, params, page_size)
+
+    def iter_item_id_pages(self, user_id: str, library_id: str, page_size: int = 500):
+        """Doorloopt alleen de films en afleveringen van een bibliotheek, zonder extra velden.
+
+        Bedoeld om de ID's te vergelijken met een lokale index.
+        """
+        params = {
+            "ParentId": library_id,
+            "Recursive": "true",
+            "SortBy": "DateCreated,SortName",
+            "SortOrder": "Ascending",
+            "IncludeItemTypes": "Movie,Episode",
+            "EnableImages": "false",
+            "EnableUserData": "false",
+        }
+        return self._iter_item_pages(user_id, params, page_size)
+
+    def iter_played_pages(self, user_id: str, since: str | None = None, page_size: int = 500):
+        """Doorloopt de bekeken films en afleveringen van een gebruiker.
+
+        Zonder 'since' alleen de gespeelde items; met 'since' alle items waarvan
+        de gebruikersdata sindsdien is gewijzigd, met UserData.Played.
+        """
+        params = {
+            "Recursive": "true",
+            "SortBy": "SortName",
+            "IncludeItemTypes": "Movie,Episode",
+            "EnableImages": "false",
+        }
+        if since:
+            params["MinDateLastSavedForUser"] = since
+            params["EnableUserData"] = "true"
+        else:
+            params["IsPlayed"] = "true"
+            params["EnableUserData"] = "false"
+        return self._iter_item_pages(user_id, params, page_size)
@@ -0,0 +1,110 @@
+"""Lightweight request instrumentation for the Emby API client."""
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from .const import LATENCY_BUCKETS
+
+# Request count and time per endpoint of the block running collect_timings, if any
+_timings: ContextVar[dict[str, list] | None] = ContextVar("emby_stats_timings", default=None)
+
+
+@contextmanager
+def collect_timings():
+    """Collect the request count and time per endpoint of the requests made in the block.
+
+    Tasks started in the block report to the same collector, while other
+    users of a shared client do not. A request that joins an identical one
+    already in flight is counted by whoever started it.
+    """
+    timings = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+@dataclass(slots=True)
+class EndpointStats:
+    """Counters and a latency histogram of a single endpoint."""
+
+    requests: int = 0
+    errors: int = 0
+    bytes_received: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    # One count per bucket in LATENCY_BUCKETS plus one for slower requests
+    histogram: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes_received": self.bytes_received,
+            "mean_ms": round(self.mean_time * 1000, 1),
+            "max_ms": round(self.max_time * 1000, 1),
+            "histogram_ms": {
+                **{f"<={bound * 1000:g}": count for bound, count in zip(LATENCY_BUCKETS, self.histogram)},
+                f">{LATENCY_BUCKETS[-1] * 1000:g}": self.histogram[-1],
+            },
+        }
+
+
+class _Measurement:
+    __slots__ = ("bytes_received", "error")
+
+    def __init__(self):
+        self.bytes_received = 0
+        self.error = False
+
+
+class ClientMetrics:
+    """Per-endpoint request counts, errors, bytes and latencies of a client."""
+
+    def __init__(self):
+        self.endpoints: dict[str, EndpointStats] = {}
+
+    @contextmanager
+    def measure(self, endpoint: str):
+        """Time one request; an exception leaving the block counts as an error."""
+        measurement = _Measurement()
+        start = time.perf_counter()
+        try:
+            yield measurement
+        except BaseException:
+            measurement.error = True
+            raise
+        finally:
+            self.record(endpoint, time.perf_counter() - start, measurement.bytes_received, measurement.error)
+
+    def record(self, endpoint: str, seconds: float, bytes_received: int = 0, error: bool = False) -> None:
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        stats.requests += 1
+        stats.errors += error
+        stats.bytes_received += bytes_received
+        stats.total_time += seconds
+        stats.max_time = max(stats.max_time, seconds)
+        stats.histogram[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        if (timings := _timings.get()) is not None:
+            timing = timings.setdefault(endpoint, [0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+
+    @property
+    def slowest_endpoint(self) -> str | None:
+        """Return the endpoint with the highest mean latency."""
+        if not self.endpoints:
+            return None
+        return max(self.endpoints, key=lambda endpoint: self.endpoints[endpoint].mean_time)
+
+    def as_dict(self) -> dict:
+        return {endpoint: stats.as_dict() for endpoint, stats in sorted(self.endpoints.items())}
@@ -0,0 +1,197 @@
+"""Bounded on-disk cache for Emby posters."""
+import asyncio
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    POSTER_FOLDER,
+    POSTER_URL_PATH,
+    POSTER_EMPTY,
+    POSTER_DOWNLOAD_CONCURRENCY,
+    POSTER_DOWNLOAD_RETRIES,
+    POSTER_DOWNLOAD_BACKOFF,
+    POSTER_FAILURE_TTL,
+)
+from .emby_api import EmbyApiClient, EmbyApiError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PosterCache:
+    """Cache poster thumbnails under www/emby_posters with LRU eviction.
+
+    Files are keyed by item ID and image tag, so changed artwork gets a new
+    file. The index lives in memory and is rebuilt from disk on startup.
+    Downloads go through one queue that skips posters already in flight,
+    limits concurrency, retries transient errors with backoff and writes
+    files atomically. Posters that failed are not requested again for an
+    hour, so a missing image is not fetched on every refresh.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_bytes: int):
+        self._hass = hass
+        self.max_bytes = max_bytes
+        self.folder = Path(hass.config.path(POSTER_FOLDER))
+        # filename -> size in bytes, least recently used first
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        self._in_flight: dict[str, asyncio.Task] = {}
+        # filename -> monotonic time after which a failed download may be retried
+        self._failed: dict[str, float] = {}
+        self._semaphore = asyncio.Semaphore(POSTER_DOWNLOAD_CONCURRENCY)
+        self._listeners: list = []
+
+    @staticmethod
+    def filename(item_id: str, image_tag: str) -> str:
+        """Return the cache filename for an item's poster."""
+        return f"{item_id}_{image_tag}.jpg"
+
+    @staticmethod
+    def local_url(filename: str | None) -> str:
+        """Return the URL Home Assistant serves a cached file from."""
+        return f"{POSTER_URL_PATH}/{filename or POSTER_EMPTY}"
+
+    def contains(self, filename: str) -> bool:
+        """Return True if the file is cached and mark it as recently used."""
+        if filename not in self._index:
+            return False
+        self._index.move_to_end(filename)
+        return True
+
+    @callback
+    def async_add_listener(self, listener) -> Callable[[], None]:
+        """Call listener(filename) whenever a poster was added; return a remover."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    async def async_load(self) -> None:
+        """Rebuild the index from the files on disk and enforce the quota."""
+        entries = await self._hass.async_add_executor_job(self._scan)
+        self._index = OrderedDict(entries)
+        self._size = sum(self._index.values())
+        _LOGGER.debug("Poster cache holds %d files, %d bytes", len(self._index), self._size)
+        await self._async_evict()
+
+    def _scan(self) -> list[tuple[str, int]]:
+        """Prepare the folder and list cached files, oldest first."""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        empty_jpg = self.folder / POSTER_EMPTY
+        if not empty_jpg.exists():
+            src = Path(__file__).parent / "empty.png"
+            if src.exists():
+                shutil.copy(src, empty_jpg)
+
+        files = []
+        for path in self.folder.glob("*.tmp"):
+            # Leftovers from writes interrupted by a restart
+            path.unlink(missing_ok=True)
+        for path in self.folder.glob("*.jpg"):
+            if path.name == POSTER_EMPTY:
+                continue
+            if "_" not in path.stem:
+                # Posters from before tag-based keys can never be referenced again
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            files.append((stat.st_mtime, path.name, stat.st_size))
+        files.sort()
+        return [(name, size) for _mtime, name, size in files]
+
+    @callback
+    def schedule_download(self, client: EmbyApiClient, url: str, filename: str) -> None:
+        """Queue a poster download unless it is cached or already being fetched."""
+        if filename in self._index or filename in self._in_flight:
+            return
+        if self._failed.get(filename, 0) > time.monotonic():
+            return
+        task = self._hass.async_create_background_task(
+            self._async_download(client, url, filename), f"emby_stats poster {filename}"
+        )
+        self._in_flight[filename] = task
+        task.add_done_callback(lambda _task: self._in_flight.pop(filename, None))
+
+    @callback
+    def prefetch(self, client: EmbyApiClient, items: list[dict]) -> None:
+        """Mark the posters of the given items as used and queue missing ones.
+
+        Called on every refresh, so posters that were evicted are fetched
+        again while they are still shown, and failed ones once they expired.
+        """
+        for item in items:
+            if item.get("image_url_original") and item.get("image_tag"):
+                filename = self.filename(item["id"], item["image_tag"])
+                if not self.contains(filename):
+                    self.schedule_download(client, item["image_url_original"], filename)
+
+    async def _async_download(self, client: EmbyApiClient, url: str, filename: str) -> None:
+        """Download a poster into the cache, retrying transient failures."""
+        async with self._semaphore:
+            for attempt in range(POSTER_DOWNLOAD_RETRIES + 1):
+                try:
+                    content = await client.async_get_image(url)
+                    break
+                except EmbyApiError as err:
+                    if not err.transient or attempt == POSTER_DOWNLOAD_RETRIES:
+                        _LOGGER.warning("Error downloading poster %s: %s", filename, err)
+                        self._record_failure(filename)
+                        return
+                    await asyncio.sleep(POSTER_DOWNLOAD_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+        if not content:
+            return
+        await self._hass.async_add_executor_job(self._write, filename, content)
+        self._add(filename, len(content))
+        await self._async_evict()
+        if filename in self._index:
+            for listener in list(self._listeners):
+                listener(filename)
+
+    def _record_failure(self, filename: str) -> None:
+        """Skip a poster for a while and forget failures that expired."""
+        now = time.monotonic()
+        self._failed = {name: retry_at for name, retry_at in self._failed.items() if retry_at > now}
+        self._failed[filename] = now + POSTER_FAILURE_TTL
+
+    def _write(self, filename: str, content: bytes) -> None:
+        """Write a file via a temporary file so readers never see a partial poster."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(content)
+            os.replace(tmp_path, self.folder / filename)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _add(self, filename: str, size: int) -> None:
+        self._size += size - self._index.pop(filename, 0)
+        self._index[filename] = size
+
+    async def async_set_quota(self, max_bytes: int) -> None:
+        """Change the quota, evicting right away when it shrank."""
+        self.max_bytes = max_bytes
+        await self._async_evict()
+
+    async def _async_evict(self) -> None:
+        """Remove least recently used files until the cache fits its quota."""
+        evicted = []
+        while self._size > self.max_bytes and len(self._index) > 1:
+            filename, size = self._index.popitem(last=False)
+            self._size -= size
+            evicted.append(self.folder / filename)
+        if evicted:
+            _LOGGER.debug("Evicting %d posters from the cache", len(evicted))
+            await self._hass.async_add_executor_job(_unlink_all, evicted)
+
+
+def _unlink_all(paths: list[Path]) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
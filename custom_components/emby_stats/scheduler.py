@@ -0,0 +1,44 @@
+"""Adaptive polling interval for the Emby Stats coordinator."""
+import random
+from datetime import timedelta
+
+from .const import SCHEDULER_SPEEDUP, SCHEDULER_SLOWDOWN, SCHEDULER_JITTER
+
+
+class AdaptiveInterval:
+    """Polling interval that follows the observed change rate.
+
+    Refreshes that find changes shorten the interval towards the minimum,
+    idle refreshes lengthen it towards the maximum and consecutive failures
+    back off exponentially. Every interval handed out carries some jitter so
+    several entries do not poll in lockstep.
+    """
+
+    def __init__(self, minimum: timedelta, maximum: timedelta, initial: timedelta):
+        self.minimum = minimum.total_seconds()
+        self.maximum = max(maximum.total_seconds(), self.minimum)
+        self._base = min(max(initial.total_seconds(), self.minimum), self.maximum)
+        self._failures = 0
+
+    def record_change(self) -> timedelta:
+        """Poll sooner after a refresh that found changes."""
+        self._failures = 0
+        self._base = max(self._base / SCHEDULER_SPEEDUP, self.minimum)
+        return self.current
+
+    def record_idle(self) -> timedelta:
+        """Poll later after a refresh that found nothing new."""
+        self._failures = 0
+        self._base = min(self._base * SCHEDULER_SLOWDOWN, self.maximum)
+        return self.current
+
+    def record_failure(self) -> timedelta:
+        """Back off exponentially while refreshes keep failing."""
+        self._failures += 1
+        return self.current
+
+    @property
+    def current(self) -> timedelta:
+        """Return the next interval with jitter applied."""
+        seconds = min(self._base * 2 ** self._failures, self.maximum)
+        return timedelta(seconds=seconds * random.uniform(1 - SCHEDULER_JITTER, 1 + SCHEDULER_JITTER))
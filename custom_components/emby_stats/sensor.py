@@ -1,13 +1,14 @@
 from homeassistant.components.sensor import SensorEntity, SensorStateClass
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from .aggregate import EmbyAggregateCoordinator
+from .analytics import EmbyAnalyticsCoordinator
 from .const import DOMAIN
 from .coordinator import EmbyStatsCoordinator
-from pathlib import Path
-import aiohttp
-import shutil
+from .view_model import LARGE_ATTRIBUTES
 import logging
 
 _LOGGER = logging.getLogger(__name__)
@@ -25,9 +26,32 @@ SENSOR_TYPES = {
     "last_updated_tvshows_title": {"name": "Last Updated TV Shows", "icon": "mdi:update"},
 }
 
+# Sensors that exist once per configured user; all others are library-wide
+USER_SENSOR_KEYS = ("unwatched_tvshows", "unwatched_movies", "watched_tvshows", "watched_movies")
+
+# Request metrics, disabled by default
+DIAGNOSTIC_SENSOR_TYPES = {
+    "last_refresh_duration": {"name": "Last Refresh Duration", "icon": "mdi:timer-outline", "unit": "s"},
+    "slowest_endpoint": {"name": "Slowest Endpoint", "icon": "mdi:speedometer-slow"},
+    "cache_hit_ratio": {"name": "Cache Hit Ratio", "icon": "mdi:cached", "unit": "%"},
+}
+
+# Library analytics, created when the analytics option is enabled
+ANALYTICS_SENSOR_TYPES = {
+    "library_runtime": {"name": "Library Runtime", "icon": "mdi:clock-outline", "unit": "h"},
+    "library_size": {"name": "Library Size", "icon": "mdi:harddisk", "unit": "GB"},
+    "genres": {"name": "Genres", "icon": "mdi:tag-multiple"},
+    "resolutions": {"name": "Most Common Resolution", "icon": "mdi:monitor-screenshot"},
+}
+
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
-    coordinator: EmbyStatsCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator: EmbyStatsCoordinator | EmbyAggregateCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    if isinstance(coordinator, EmbyAggregateCoordinator):
+        async_add_entities(_aggregate_entities(coordinator))
+        return
+
     username = coordinator.user_id.lower().replace(" ", "_")
+    multi_user = len(coordinator.user_ids) > 1
     entities = []
 
     for key, data in SENSOR_TYPES.items():
@@ -35,7 +59,14 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
         name = data["name"]
         icon = data["icon"]
         unit = data.get("unit")
-        if "last_" in key:
+        if key in USER_SENSOR_KEYS:
+            for user_id in coordinator.user_ids:
+                user_name = coordinator.user_names.get(user_id, user_id)
+                entities.append(EmbyLibraryCountSensor(
+                    coordinator, key, f"emby_stats_{user_name.lower().replace(' ', '_')}_{key}",
+                    f"{user_name} {name}" if multi_user else name, icon, unit, user_id,
+                ))
+        elif "last_" in key:
             if key == "last_updated_tvshows_title":
                 entities.append(LatestUpdatedSeriesSensor(coordinator, key, full_name, name, icon))
             else:
@@ -43,17 +74,54 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
         else:
             entities.append(EmbyLibraryCountSensor(coordinator, key, full_name, name, icon, unit))
 
+    if (analytics := coordinator.analytics) is not None:
+        for key, data in ANALYTICS_SENSOR_TYPES.items():
+            entities.append(EmbyAnalyticsSensor(
+                analytics, key, f"emby_stats_{username}_{key}", data["name"], data["icon"], data.get("unit")
+            ))
+        for user_id in coordinator.user_ids:
+            user_name = coordinator.user_names.get(user_id, user_id)
+            entities.append(EmbyAnalyticsSensor(
+                analytics, "watched_hours", f"emby_stats_{user_name.lower().replace(' ', '_')}_watched_hours",
+                f"{user_name} Watched Hours" if multi_user else "Watched Hours", "mdi:history", "h", user_id,
+            ))
+
+    for key, data in DIAGNOSTIC_SENSOR_TYPES.items():
+        entities.append(EmbyDiagnosticSensor(
+            coordinator, key, f"emby_stats_{username}_{key}", data["name"], data["icon"], data.get("unit")
+        ))
+
     async_add_entities(entities)
 
 
+def _aggregate_entities(coordinator: EmbyAggregateCoordinator) -> list:
+    """Create the sensors of a combined entry; user counts are summed per server."""
+    entities = []
+    for key, data in SENSOR_TYPES.items():
+        full_name = f"emby_stats_combined_{key}"
+        if key == "last_updated_tvshows_title":
+            entities.append(LatestUpdatedSeriesSensor(coordinator, key, full_name, data["name"], data["icon"]))
+        elif "last_" in key:
+            entities.append(LatestItemSensor(coordinator, key, full_name, data["name"], data["icon"]))
+        else:
+            entities.append(EmbyLibraryCountSensor(coordinator, key, full_name, data["name"], data["icon"], data.get("unit")))
+    return entities
+
+
 class EmbyLibraryCountSensor(CoordinatorEntity, SensorEntity):
     _attr_has_entity_name = True
 
-    def __init__(self, coordinator: EmbyStatsCoordinator, key: str, entity_id: str, name: str, icon: str, unit: str):
+    def __init__(self, coordinator: EmbyStatsCoordinator, key: str, entity_id: str, name: str, icon: str, unit: str,
+                 user_id: str | None = None):
         super().__init__(coordinator)
         self._key = key
+        self._user_id = user_id
         self._attr_name = name
-        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{key}"
+        # The primary user keeps the unique ID from before multi-user support
+        if user_id is None or user_id == coordinator.user_id:
+            self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{key}"
+        else:
+            self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{user_id}_{key}"
         self._attr_icon = icon
         self._unit = unit
         if unit == "items":
@@ -63,8 +131,16 @@ class EmbyLibraryCountSensor(CoordinatorEntity, SensorEntity):
 
     @property
     def native_value(self):
+        if self._user_id is not None:
+            return self.coordinator.data.get("users", {}).get(self._user_id, {}).get(self._key)
         return self.coordinator.data.get(self._key)
 
+    @property
+    def extra_state_attributes(self):
+        if stale_since := self.coordinator.data.get("stale_since"):
+            return {"stale_since": stale_since}
+        return None
+
     @property
     def unit_of_measurement(self):
         return self._unit
@@ -72,6 +148,7 @@ class EmbyLibraryCountSensor(CoordinatorEntity, SensorEntity):
 
 class LatestItemSensor(CoordinatorEntity, SensorEntity):
     _attr_has_entity_name = True
+    _unrecorded_attributes = LARGE_ATTRIBUTES
 
     def __init__(self, coordinator: EmbyStatsCoordinator, key: str, entity_id: str, name: str, icon: str):
         super().__init__(coordinator)
@@ -80,13 +157,6 @@ class LatestItemSensor(CoordinatorEntity, SensorEntity):
         self._attr_name = name
         self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{key}"
         self._attr_icon = icon
-        self._poster_folder = Path(coordinator.hass.config.path("www/emby_posters"))
-        self._poster_folder.mkdir(parents=True, exist_ok=True)
-        empty_jpg = self._poster_folder / "empty.jpg"
-        if not empty_jpg.exists():
-            src = Path(__file__).parent / "empty.png"
-            if src.exists():
-                shutil.copy(src, empty_jpg)
 
     @property
     def native_value(self):
@@ -94,47 +164,16 @@ class LatestItemSensor(CoordinatorEntity, SensorEntity):
 
     @property
     def extra_state_attributes(self):
-        data_list = self.coordinator.data.get(self._data_key)
-        if not data_list:
-            return {"status": "No recent items found"}
-
-        for item in data_list[:10]:
-            local_path = self._poster_folder / f"{item['id']}.jpg"
-            if item.get("image_url_original"):
-                item["image_url"] = f"/local/emby_posters/{item['id']}.jpg"
-                if not local_path.exists():
-                    self.coordinator.hass.async_create_task(self._download_image(item["image_url_original"], local_path))
-            else:
-                item["image_url"] = f"/local/emby_posters/empty.jpg"
-
-        latest_titles_list = [f"**{i+1}.** {item['title']} ({item['date_added'][:10]})" for i, item in enumerate(data_list[:10])]
-        return {
-            "Top 10 Recently Added": "\n".join(latest_titles_list),
-            "Most Recent Item ID": data_list[0].get('id'),
-            "Most Recent Added Date": data_list[0].get('date_added'),
-            "Item List (JSON)": data_list,
-        }
+        return self.coordinator.data["views"][self._data_key].attributes
 
     @property
     def entity_picture(self):
-        data_list = self.coordinator.data.get(self._data_key)
-        if data_list and data_list[0].get("image_url"):
-            return data_list[0]["image_url"]
-        return "/local/emby_posters/empty.jpg"
-
-    async def _download_image(self, url, local_path: Path):
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status == 200:
-                        with open(local_path, "wb") as f:
-                            f.write(await resp.read())
-        except Exception as e:
-            _LOGGER.error("Error downloading poster %s: %s", url, e)
+        return self.coordinator.data["views"][self._data_key].entity_picture
 
 
 class LatestUpdatedSeriesSensor(CoordinatorEntity, SensorEntity):
     _attr_has_entity_name = True
+    _unrecorded_attributes = LARGE_ATTRIBUTES
 
     def __init__(self, coordinator: EmbyStatsCoordinator, key: str, entity_id: str, name: str, icon: str):
         super().__init__(coordinator)
@@ -143,62 +182,101 @@ class LatestUpdatedSeriesSensor(CoordinatorEntity, SensorEntity):
         self._attr_name = name
         self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{key}"
         self._attr_icon = icon
-        self._poster_folder = Path(coordinator.hass.config.path("www/emby_posters"))
-        self._poster_folder.mkdir(parents=True, exist_ok=True)
-        empty_jpg = self._poster_folder / "empty.jpg"
-        if not empty_jpg.exists():
-            src = Path(__file__).parent / "empty.png"
-            if src.exists():
-                shutil.copy(src, empty_jpg)
 
     @property
     def native_value(self):
-        data_list = self.coordinator.data.get(self._data_key)
-        return data_list[0]['title'] if data_list else "None"
+        return self.coordinator.data["views"][self._data_key].state
 
     @property
     def extra_state_attributes(self):
-        data_list = self.coordinator.data.get(self._data_key)
-        if not data_list:
-            return {"status": "No recently updated series found"}
-
-        # Maak dict op basis van unieke series (SeriesId)
-        seen_series = set()
-        unique_series = []
-        for item in data_list:
-            if item['id'] not in seen_series:
-                seen_series.add(item['id'])
-                unique_series.append(item)
-            if len(unique_series) >= 10:
-                break
-
-        for item in unique_series:
-            local_path = self._poster_folder / f"{item['id']}.jpg"
-            if item.get("image_url_original"):
-                item["image_url"] = f"/local/emby_posters/{item['id']}.jpg"
-                if not local_path.exists():
-                    self.coordinator.hass.async_create_task(self._download_image(item["image_url_original"], local_path))
-            else:
-                item["image_url"] = f"/local/emby_posters/empty.jpg"
-
-        return {
-            "Top 10 Latest Updated Series": [f"**{i+1}.** {s['title']} ({s['date_added'][:10]})" for i, s in enumerate(unique_series)],
-            "Item List (JSON)": unique_series,
-        }
+        return self.coordinator.data["views"][self._data_key].attributes
 
     @property
     def entity_picture(self):
-        data_list = self.coordinator.data.get(self._data_key)
-        if data_list and data_list[0].get("image_url"):
-            return data_list[0]["image_url"]
-        return "/local/emby_posters/empty.jpg"
-
-    async def _download_image(self, url, local_path: Path):
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status == 200:
-                        with open(local_path, "wb") as f:
-                            f.write(await resp.read())
-        except Exception as e:
-            _LOGGER.error("Error downloading poster %s: %s", url, e)
+        return self.coordinator.data["views"][self._data_key].entity_picture
+
+
+class EmbyDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator: EmbyStatsCoordinator, key: str, entity_id: str, name: str, icon: str, unit: str | None):
+        super().__init__(coordinator)
+        self._key = key
+        self._attr_name = name
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{key}"
+        self._attr_icon = icon
+        self._attr_native_unit_of_measurement = unit
+        if unit is not None:
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self):
+        client = self.coordinator.client
+        if self._key == "last_refresh_duration":
+            duration = self.coordinator.last_refresh_duration
+            return round(duration, 2) if duration is not None else None
+        if self._key == "slowest_endpoint":
+            return client.metrics.slowest_endpoint
+        ratio = client.cache_hit_ratio
+        return round(ratio * 100, 1) if ratio is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        if self._key == "slowest_endpoint" and (endpoint := self.coordinator.client.metrics.slowest_endpoint):
+            stats = self.coordinator.client.metrics.endpoints[endpoint]
+            return {"mean_ms": round(stats.mean_time * 1000, 1), "requests": stats.requests}
+        if self._key == "cache_hit_ratio":
+            return {
+                "cache_hits": self.coordinator.client.cache_hits,
+                "coalesced_requests": self.coordinator.client.coalesced_requests,
+            }
+        return None
+
+
+class EmbyAnalyticsSensor(CoordinatorEntity, SensorEntity):
+    _attr_has_entity_name = True
+
+    def __init__(self, coordinator: EmbyAnalyticsCoordinator, key: str, entity_id: str, name: str, icon: str,
+                 unit: str | None, user_id: str | None = None):
+        super().__init__(coordinator)
+        self._key = key
+        self._user_id = user_id
+        self._attr_name = name
+        if user_id is None:
+            self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{key}"
+        else:
+            self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{user_id}_{key}"
+        self._attr_icon = icon
+        self._attr_native_unit_of_measurement = unit
+        if unit is not None:
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self):
+        data = self.coordinator.data
+        if data is None:
+            return None
+        if self._key == "library_runtime":
+            return data["runtime_hours"]
+        if self._key == "library_size":
+            return round(data["size_bytes"] / 1e9, 1)
+        if self._key == "genres":
+            return data["genre_count"]
+        if self._key == "resolutions":
+            return max(data["resolutions"], key=data["resolutions"].get, default=None)
+        return data["watched_hours"].get(self._user_id)
+
+    @property
+    def extra_state_attributes(self):
+        data = self.coordinator.data
+        if data is None:
+            return None
+        if self._key == "genres":
+            return data["genres"]
+        if self._key == "resolutions":
+            return data["resolutions"]
+        if self._key in ("library_runtime", "library_size"):
+            return {"item_count": data["item_count"]}
+        return None
@@ -0,0 +1,137 @@
+"""Precomputed, read-only sensor views built once per coordinator refresh."""
+from dataclasses import dataclass, replace
+from typing import Any
+
+from homeassistant.util.read_only_dict import ReadOnlyDict
+
+from .const import LATEST_LIMIT
+from .poster_cache import PosterCache
+
+# Latest-list data keys and the attribute layout of the sensor showing them
+LATEST_VIEWS = {
+    "last_tvshows_data": "recently_added",
+    "last_movies_data": "recently_added",
+    "last_updated_tvshows_data": "updated_series",
+}
+
+# Attributes too large to store in the recorder on every state change
+LARGE_ATTRIBUTES = frozenset({
+    "Top 10 Recently Added",
+    "Top 10 Latest Updated Series",
+    "Item List (JSON)",
+})
+
+# Item fields kept in compact mode
+COMPACT_FIELDS = ("id", "title", "date_added")
+
+
+@dataclass(frozen=True, slots=True)
+class LatestListView:
+    """State, attributes and picture of a "latest" sensor.
+
+    items holds the full item list, also in compact mode, for the
+    emby_stats/items websocket command.
+    """
+
+    state: str
+    attributes: ReadOnlyDict[str, Any]
+    entity_picture: str
+    items: tuple[ReadOnlyDict, ...] = ()
+
+
+def _with_local_poster(item: dict, poster_cache: PosterCache | None = None) -> ReadOnlyDict:
+    """Return a read-only copy of an item pointing at its cached poster.
+
+    The Emby image URL is left out; it is only needed to download the poster.
+    Posters not in the cache yet point at the empty placeholder, and looking
+    a poster up marks it as recently used.
+    """
+    filename = None
+    if item.get("image_url_original") and item.get("image_tag"):
+        filename = PosterCache.filename(item["id"], item["image_tag"])
+        if poster_cache is not None and not poster_cache.contains(filename):
+            filename = None
+    image_url = PosterCache.local_url(filename)
+    return ReadOnlyDict({
+        "title": item["title"],
+        "date_added": item["date_added"],
+        "image_url": image_url,
+        "id": item["id"],
+    })
+
+
+def _compact(items: tuple[ReadOnlyDict, ...]) -> tuple[ReadOnlyDict, ...]:
+    return tuple(ReadOnlyDict({field: item[field] for field in COMPACT_FIELDS}) for item in items)
+
+
+def _line(index: int, item: ReadOnlyDict) -> str:
+    return f"**{index + 1}.** {item['title']} ({(item['date_added'] or '')[:10]})"
+
+
+def build_recently_added_view(data_list: list[dict], compact: bool = False,
+                              poster_cache: PosterCache | None = None) -> LatestListView:
+    """Build the view of a recently added movies or TV shows sensor."""
+    if not data_list:
+        return LatestListView("None", ReadOnlyDict({"status": "No recent items found"}), PosterCache.local_url(None))
+
+    items = tuple(_with_local_poster(item, poster_cache) for item in data_list[:LATEST_LIMIT])
+    if compact:
+        attributes = {
+            "Most Recent Item ID": items[0].get('id'),
+            "Most Recent Added Date": items[0].get('date_added'),
+            "Item List (JSON)": _compact(items),
+        }
+    else:
+        attributes = {
+            "Top 10 Recently Added": "\n".join(_line(i, item) for i, item in enumerate(items)),
+            "Most Recent Item ID": items[0].get('id'),
+            "Most Recent Added Date": items[0].get('date_added'),
+            "Item List (JSON)": items,
+        }
+    return LatestListView(items[0]["title"], ReadOnlyDict(attributes), items[0]["image_url"], items)
+
+
+def build_updated_series_view(data_list: list[dict], compact: bool = False,
+                              poster_cache: PosterCache | None = None) -> LatestListView:
+    """Build the view of the latest updated series sensor, one entry per series."""
+    if not data_list:
+        return LatestListView(
+            "None", ReadOnlyDict({"status": "No recently updated series found"}), PosterCache.local_url(None)
+        )
+
+    unique_series = {}
+    for item in data_list:
+        unique_series.setdefault(item['id'], item)
+        if len(unique_series) >= LATEST_LIMIT:
+            break
+    items = tuple(_with_local_poster(item, poster_cache) for item in unique_series.values())
+    if compact:
+        attributes = {"Item List (JSON)": _compact(items)}
+    else:
+        attributes = {
+            "Top 10 Latest Updated Series": tuple(_line(i, item) for i, item in enumerate(items)),
+            "Item List (JSON)": items,
+        }
+    return LatestListView(items[0]["title"], ReadOnlyDict(attributes), items[0]["image_url"], items)
+
+
+def build_views(data: dict, compact: bool = False,
+                poster_cache: PosterCache | None = None) -> ReadOnlyDict[str, LatestListView]:
+    """Build the views of all "latest" sensors from coordinator data.
+
+    Data restored from a snapshot marks every view with a stale_since attribute.
+    """
+    builders = {
+        "recently_added": build_recently_added_view,
+        "updated_series": build_updated_series_view,
+    }
+    views = {
+        data_key: builders[layout](data.get(data_key) or [], compact, poster_cache)
+        for data_key, layout in LATEST_VIEWS.items()
+    }
+    if stale_since := data.get("stale_since"):
+        views = {
+            data_key: replace(view, attributes=ReadOnlyDict({**view.attributes, "stale_since": stale_since}))
+            for data_key, view in views.items()
+        }
+    return ReadOnlyDict(views)
@@ -0,0 +1,140 @@
+"""WebSocket listener for Emby change notifications."""
+import asyncio
+import json
+import logging
+import math
+import random
+from collections.abc import Callable
+
+import aiohttp
+
+from .const import WEBSOCKET_BACKOFF_MAX, WEBSOCKET_BACKOFF_MIN
+from .emby_api import EmbyApiClient, EmbyApiError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Messages the coordinator acts on; everything else is ignored
+SUBSCRIBED_MESSAGES = ("LibraryChanged", "UserDataChanged")
+
+
+def keepalive_interval(timeout) -> float:
+    """Return how often to send a keepalive for Emby's ForceKeepAlive timeout.
+
+    Emby drops sessions that stay silent for longer than the timeout, given in
+    seconds; a missing or malformed value falls back to Emby's default of 60.
+    """
+    try:
+        timeout = float(timeout)
+    except (TypeError, ValueError):
+        timeout = 60.0
+    if not math.isfinite(timeout) or timeout <= 0:
+        timeout = 60.0
+    return max(timeout / 2, 5)
+
+
+class EmbyWebSocketListener:
+    """Keep a websocket open to Emby and forward library and user data changes.
+
+    The connection is re-established with jittered exponential backoff
+    whenever it drops.
+    """
+
+    def __init__(
+        self,
+        client: EmbyApiClient,
+        on_message: Callable[[str, dict], None],
+        on_connection_change: Callable[[bool], None] | None = None,
+    ):
+        self._client = client
+        self._on_message = on_message
+        self._on_connection_change = on_connection_change
+        self._task: asyncio.Task | None = None
+        self.connected = False
+
+    def start(self, hass) -> None:
+        """Start listening in a background task."""
+        if self._task is None:
+            self._task = hass.async_create_background_task(self._async_run(), "emby_stats websocket")
+
+    async def async_stop(self) -> None:
+        """Stop listening and close the connection."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._set_connected(False)
+
+    def _set_connected(self, connected: bool) -> None:
+        if connected != self.connected:
+            self.connected = connected
+            if self._on_connection_change is not None:
+                self._on_connection_change(connected)
+
+    async def _async_run(self) -> None:
+        """Connect, listen and reconnect with backoff until cancelled."""
+        attempt = 0
+        while True:
+            try:
+                ws = await self._client.async_ws_connect()
+            except EmbyApiError as err:
+                _LOGGER.debug("Emby websocket connection failed: %s", err)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected error connecting to the Emby websocket")
+            else:
+                attempt = 0
+                _LOGGER.debug("Emby websocket connected")
+                try:
+                    self._set_connected(True)
+                    await self._async_listen(ws)
+                except Exception:  # pylint: disable=broad-except
+                    # Whatever went wrong, only this connection is lost; keep reconnecting
+                    _LOGGER.exception("Unexpected error in the Emby websocket listener")
+                finally:
+                    await ws.close()
+                    self._set_connected(False)
+                _LOGGER.debug("Emby websocket disconnected")
+
+            delay = min(WEBSOCKET_BACKOFF_MAX, WEBSOCKET_BACKOFF_MIN * 2 ** attempt)
+            attempt += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _async_listen(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        """Dispatch messages until the connection closes."""
+        keepalive: asyncio.Task | None = None
+        try:
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    if msg.type == aiohttp.WSMsgType.ERROR:
+                        _LOGGER.debug("Emby websocket error: %s", ws.exception())
+                    continue
+                try:
+                    message = json.loads(msg.data)
+                except ValueError:
+                    continue
+                if not isinstance(message, dict):
+                    continue
+                message_type = message.get("MessageType")
+                if message_type == "ForceKeepAlive" and keepalive is None:
+                    interval = keepalive_interval(message.get("Data"))
+                    keepalive = asyncio.create_task(self._async_keepalive(ws, interval))
+                elif message_type in SUBSCRIBED_MESSAGES:
+                    try:
+                        self._on_message(message_type, message.get("Data") or {})
+                    except Exception:  # pylint: disable=broad-except
+                        # A failing handler must not drop the connection
+                        _LOGGER.exception("Error handling Emby websocket message %s", message_type)
+        finally:
+            if keepalive is not None:
+                keepalive.cancel()
+
+    @staticmethod
+    async def _async_keepalive(ws: aiohttp.ClientWebSocketResponse, interval: float) -> None:
+        try:
+            while not ws.closed:
+                await ws.send_json({"MessageType": "KeepAlive"})
+                await asyncio.sleep(interval)
+        except (ConnectionError, aiohttp.ClientError):
+            pass
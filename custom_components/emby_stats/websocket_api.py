@@ -0,0 +1,32 @@
+"""Websocket commands that serve Emby item lists on demand."""
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .aggregate import EmbyAggregateCoordinator
+from .const import DOMAIN
+from .coordinator import EmbyStatsCoordinator
+from .view_model import LATEST_VIEWS
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register the Emby Stats websocket commands."""
+    websocket_api.async_register_command(hass, websocket_get_items)
+
+
+@websocket_api.websocket_command({
+    vol.Required("type"): "emby_stats/items",
+    vol.Required("entry_id"): str,
+    vol.Required("list"): vol.In(list(LATEST_VIEWS)),
+})
+@callback
+def websocket_get_items(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+    """Return the full item list behind a "latest" sensor."""
+    coordinator = hass.data.get(DOMAIN, {}).get(msg["entry_id"])
+    if not isinstance(coordinator, (EmbyStatsCoordinator, EmbyAggregateCoordinator)) or not coordinator.data:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Emby Stats entry not found")
+        return
+    view = coordinator.data["views"][msg["list"]]
+    connection.send_result(msg["id"], {"items": view.items})
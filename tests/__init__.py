@@ -0,0 +1 @@
+"""Tests for the Emby Stats integration."""
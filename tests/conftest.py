@@ -0,0 +1,81 @@
+"""Fixtures for the Emby Stats tests."""
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.emby_stats.const import (
+    CONF_MOVIE_LIBRARY_ID,
+    CONF_TV_LIBRARY_ID,
+    CONF_USER_ID,
+    CONF_USER_IDS,
+    DOMAIN,
+)
+from custom_components.emby_stats.emby_api import EmbyApiClient
+
+from .fake_emby import API_KEY, MOVIE_LIBRARY_ID, TV_LIBRARY_ID, FakeEmbyServer
+
+BENCHMARK_RESULTS = pytest.StashKey[list]()
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components in every test."""
+    yield
+
+
+@pytest.fixture
+def server_options() -> dict:
+    """Arguments for the fake Emby server; override to change the library."""
+    return {}
+
+
+@pytest.fixture
+async def emby_server(socket_enabled, server_options):
+    """Run a fake Emby server on localhost."""
+    async with FakeEmbyServer(**server_options) as server:
+        yield server
+
+
+@pytest.fixture
+async def emby_client(emby_server):
+    """Return an API client connected to the fake Emby server."""
+    client = EmbyApiClient(emby_server.url, API_KEY)
+    yield client
+    await client.async_close()
+
+
+@pytest.fixture
+def entry_options() -> dict:
+    """Options of the config entry; override to enable features."""
+    return {}
+
+
+@pytest.fixture
+def config_entry(hass, emby_server, entry_options) -> MockConfigEntry:
+    """Return a config entry for all users and both libraries of the fake server."""
+    user_ids = emby_server.library.user_ids
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Fake Emby",
+        data={
+            CONF_USER_ID: user_ids[0],
+            CONF_USER_IDS: user_ids,
+            CONF_TV_LIBRARY_ID: TV_LIBRARY_ID,
+            CONF_MOVIE_LIBRARY_ID: MOVIE_LIBRARY_ID,
+        },
+        options=entry_options,
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.fixture
+def benchmark_report(request) -> list:
+    """Collect result lines that are printed after a benchmark run."""
+    return request.config.stash.setdefault(BENCHMARK_RESULTS, [])
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if results := config.stash.get(BENCHMARK_RESULTS, None):
+        terminalreporter.section("Emby Stats benchmarks")
+        for line in results:
+            terminalreporter.write_line(line)
@@ -0,0 +1,472 @@
+"""Local stand-in for an Emby server, for tests and benchmarks.
+
+The server holds one TV and one movie library with a configurable number of
+synthetic items. Items are generated on the fly from their position, so even
+a library of 200k items costs a few megabytes. Every request can be delayed
+and can fail at random, and the server counts the requests and bytes it
+served.
+
+Run it standalone to point a development instance of Home Assistant at it:
+
+    python -m tests.fake_emby --items 50000 --latency 0.05 --port 8096
+"""
+import argparse
+import asyncio
+import json
+import random
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import WSMsgType, web
+
+API_KEY = "fake-api-key"
+TV_LIBRARY_ID = "tv"
+MOVIE_LIBRARY_ID = "movies"
+
+# Item types by code
+MOVIE, SERIES, EPISODE = 0, 1, 2
+TYPE_NAMES = ("Movie", "Series", "Episode")
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+GENRES = ("Action", "Comedy", "Drama", "Documentary", "Animation", "Thriller", "Horror", "Romance")
+RESOLUTIONS = ((1280, 720), (1920, 1080), (3840, 2160), (720, 480))
+
+# Item i is created one minute after item i - 1
+EPOCH = datetime(2015, 1, 1, tzinfo=timezone.utc)
+ID_OFFSET = 100000
+
+# The status codes Emby answers with while overloaded or restarting
+DEFAULT_ERROR_STATUS = 503
+
+
+def item_date(index: int) -> str:
+    """Return the creation date of an item in Emby's format."""
+    return (EPOCH + timedelta(minutes=index)).strftime("%Y-%m-%dT%H:%M:%S.0000000Z")
+
+
+def date_index(date: str) -> int:
+    """Return the first item index created at or after an ISO date."""
+    moment = datetime.strptime(date[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+    minutes, seconds = divmod((moment - EPOCH).total_seconds(), 60)
+    return max(int(minutes) + (seconds > 0), 0)
+
+
+class FakeLibrary:
+    """Synthetic movies, series and episodes, newest last.
+
+    Roughly 30% of the items are movies and 2% series; the rest are episodes
+    spread over the series. Whether a user played an item is derived from the
+    item and user, unless changed with ``set_played``. An item is saved when
+    it is created, and again whenever ``resave`` updates its metadata.
+    Movies and episodes can be deleted with ``remove``.
+    """
+
+    def __init__(self, items: int, users: int = 1, seed: int = 0):
+        self.user_ids = [f"user{number}" for number in range(users)]
+        self._rng = random.Random(seed)
+        self.types = bytearray()
+        # Ordinal of an episode's series, -1 for other types
+        self.series_of = array("l")
+        self.series = array("l")
+        # Newest episode per series ordinal, -1 while a series has none
+        self.last_episode = array("l")
+        # user ID -> item index -> (played, date the user data changed)
+        self._user_data: dict[str, dict[int, tuple[bool, str]]] = {user_id: {} for user_id in self.user_ids}
+        # item index -> (date last saved, name, image tag) of items saved after their creation
+        self._resaved: dict[int, tuple[str, str, str]] = {}
+        self._removed: set[int] = set()
+        # Matching indices per filter, kept up to date instead of being rebuilt
+        self._queries: dict[tuple, array] = {}
+        self.add_items(items)
+
+    def __len__(self) -> int:
+        return len(self.types) - len(self._removed)
+
+    def add_items(self, count: int) -> list[int]:
+        """Append new items, as if they were just added on the server."""
+        first = len(self.types)
+        series_share = max(count // 50, 1 if not self.series else 0)
+        codes = [SERIES] * series_share + [MOVIE] * (count * 3 // 10)
+        codes += [EPISODE] * (count - len(codes))
+        self._rng.shuffle(codes)
+        if codes and not self.series and codes[0] != SERIES:
+            # Episodes need a series to belong to
+            codes.insert(0, codes.pop(codes.index(SERIES)))
+        for index, code in enumerate(codes, first):
+            self.types.append(code)
+            if code == SERIES:
+                self.series_of.append(-1)
+                self.series.append(index)
+                self.last_episode.append(-1)
+            elif code == EPISODE:
+                ordinal = self._rng.randrange(len(self.series))
+                self.series_of.append(ordinal)
+                self.last_episode[ordinal] = index
+            else:
+                self.series_of.append(-1)
+        for key, indices in self._queries.items():
+            # New items are the newest, so appending keeps the indices sorted
+            indices.extend(index for index in range(first, len(self.types)) if self._matches(key, index))
+        return list(range(first, len(self.types)))
+
+    def _matches(self, key: tuple, index: int) -> bool:
+        parent_id, types, *played_filter = key
+        code = self.types[index]
+        if index in self._removed or code not in types or parent_id is not None and self.library_of(code) != parent_id:
+            return False
+        if played_filter:
+            user_id, played = played_filter
+            return self.played(user_id, index) == played
+        return True
+
+    def set_played(self, user_id: str, index: int, played: bool) -> None:
+        """Change whether a user played an item, with the current time as its change date."""
+        was_played = self.played(user_id, index)
+        self._user_data[user_id][index] = (played, datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"))
+        if played == was_played:
+            return
+        for key, indices in self._queries.items():
+            if len(key) == 4 and key[2] == user_id and self._matches(key[:2], index):
+                if key[3] == played:
+                    indices.insert(bisect_left(indices, index), index)
+                else:
+                    del indices[bisect_left(indices, index)]
+
+    def remove(self, index: int) -> None:
+        """Delete a movie or episode, as if it was removed on the server."""
+        if self.types[index] == SERIES:
+            raise ValueError("Only movies and episodes can be removed")
+        self._removed.add(index)
+        self._resaved.pop(index, None)
+        for indices in self._queries.values():
+            position = bisect_left(indices, index)
+            if position < len(indices) and indices[position] == index:
+                del indices[position]
+
+    def resave(self, index: int, name: str | None = None) -> None:
+        """Save an item again with new metadata and artwork, as Emby does after identifying it."""
+        saves = len(self._resaved)
+        self._resaved[index] = (
+            datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f0Z"),
+            name or self.name(index),
+            f"tag{index}-{saves}",
+        )
+
+    def name(self, index: int) -> str:
+        if (resaved := self._resaved.get(index)) is not None:
+            return resaved[1]
+        return f"{TYPE_NAMES[self.types[index]]} {index:06d}"
+
+    def saved_since(self, indices: array, since: str) -> list[int]:
+        """Return the items among indices saved at or after a date, oldest first."""
+        start = bisect_left(indices, date_index(since))
+        created = list(indices[start:])
+        first_created = created[0] if created else len(self.types)
+        # Older items only match when they were saved again since
+        resaved = sorted(
+            index for index, (saved, _name, _tag) in self._resaved.items()
+            if index < first_created and saved >= since
+            and (position := bisect_left(indices, index)) < len(indices) and indices[position] == index
+        )
+        return resaved + created
+
+    def type_counts(self) -> Counter:
+        """Return the number of items per type code."""
+        counts = Counter(self.types)
+        counts.subtract(self.types[index] for index in self._removed)
+        return counts
+
+    def played(self, user_id: str, index: int) -> bool:
+        if (user_data := self._user_data[user_id].get(index)) is not None:
+            return user_data[0]
+        return (index * 2654435761 + self.user_ids.index(user_id)) % 3 == 0
+
+    @staticmethod
+    def library_of(code: int) -> str:
+        return MOVIE_LIBRARY_ID if code == MOVIE else TV_LIBRARY_ID
+
+    def item_id(self, index: int) -> str:
+        return str(ID_OFFSET + index)
+
+    def index_of(self, item_id: str) -> int | None:
+        try:
+            index = int(item_id) - ID_OFFSET
+        except ValueError:
+            return None
+        return index if 0 <= index < len(self.types) and index not in self._removed else None
+
+    def query(self, parent_id: str | None, types: tuple[int, ...]) -> array:
+        """Return the indices of the matching items, oldest first."""
+        key = (parent_id, types)
+        if (indices := self._queries.get(key)) is None:
+            indices = self._queries[key] = array("l", (
+                index for index in range(len(self.types)) if self._matches(key, index)
+            ))
+        return indices
+
+    def played_query(self, user_id: str, parent_id: str | None, types: tuple[int, ...], played: bool) -> array:
+        """Return the indices of the matching items a user did or did not play."""
+        key = (parent_id, types, user_id, played)
+        if (indices := self._queries.get(key)) is None:
+            indices = self._queries[key] = array("l", (
+                index for index in self.query(parent_id, types) if self._matches(key, index)
+            ))
+        return indices
+
+    def user_data_changed(self, user_id: str, since: str, types: tuple[int, ...]) -> list[int]:
+        """Return the items whose user data changed at or after a date."""
+        return sorted(
+            index for index, (_played, changed_at) in self._user_data[user_id].items()
+            if self.types[index] in types and changed_at >= since[:19] and index not in self._removed
+        )
+
+    def series_by_last_content(self, parent_id: str | None) -> list[int]:
+        """Return the series with episodes, newest episode first."""
+        if parent_id not in (None, TV_LIBRARY_ID):
+            return []
+        ordinals = [ordinal for ordinal in range(len(self.series)) if self.last_episode[ordinal] >= 0]
+        ordinals.sort(key=lambda ordinal: self.last_episode[ordinal], reverse=True)
+        return [self.series[ordinal] for ordinal in ordinals]
+
+    def dto(self, index: int, fields: set[str], user_id: str | None = None, user_data: bool = False) -> dict:
+        """Return an item as an Emby BaseItemDto with the requested fields."""
+        code = self.types[index]
+        saved, _name, tag = self._resaved.get(index) or (item_date(index), None, f"tag{index}")
+        dto = {
+            "Id": self.item_id(index),
+            "Name": self.name(index),
+            "Type": TYPE_NAMES[code],
+            "ImageTags": {"Primary": tag},
+        }
+        if code == EPISODE:
+            series = self.series[self.series_of[index]]
+            dto["SeriesId"] = self.item_id(series)
+            dto["SeriesName"] = self.name(series)
+            dto["SeriesPrimaryImageTag"] = (self._resaved.get(series) or (None, None, f"tag{series}"))[2]
+        if code != SERIES:
+            dto["RunTimeTicks"] = (20 if code == EPISODE else 100) * 60 * 10_000_000 + index % 600 * 10_000_000
+        if "DateCreated" in fields:
+            dto["DateCreated"] = item_date(index)
+        if "DateLastSaved" in fields:
+            dto["DateLastSaved"] = saved
+        if "OriginalTitle" in fields:
+            dto["OriginalTitle"] = dto["Name"]
+        if "DateLastMediaAdded" in fields and code == SERIES:
+            last_episode = self.last_episode[self.series.index(index)]
+            if last_episode >= 0:
+                dto["DateLastMediaAdded"] = item_date(last_episode)
+        if "Genres" in fields:
+            dto["Genres"] = [GENRES[index % len(GENRES)], GENRES[index * 7 % len(GENRES)]]
+        if "Size" in fields and code != SERIES:
+            dto["Size"] = (500 + index % 4000) * 1_000_000
+        if code != SERIES and ("Width" in fields or "Height" in fields):
+            dto["Width"], dto["Height"] = RESOLUTIONS[index % len(RESOLUTIONS)]
+        if user_data and user_id is not None:
+            dto["UserData"] = {"Played": self.played(user_id, index)}
+        return dto
+
+
+class FakeEmbyServer:
+    """An aiohttp server emulating the Emby endpoints the integration uses.
+
+    ``latency`` delays every response by that many seconds and ``error_rate``
+    makes that share of the requests fail with ``error_status``. ``fail_next``
+    fails an exact number of upcoming requests instead. Requests, bytes and
+    the paths they went to are counted in ``requests``, ``bytes_sent`` and
+    ``endpoints``.
+    """
+
+    def __init__(
+        self,
+        items: int = 1000,
+        users: int = 1,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = DEFAULT_ERROR_STATUS,
+        image_size: int = 30_000,
+        seed: int = 0,
+    ):
+        self.library = FakeLibrary(items, users, seed)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fail_next = 0
+        self.image = bytes(random.Random(seed).getrandbits(8) for _ in range(image_size))
+        self.requests = 0
+        self.bytes_sent = 0
+        self.endpoints: Counter[str] = Counter()
+        self.url = None
+        self._rng = random.Random(seed)
+        self._runner = None
+        self._websockets: set[web.WebSocketResponse] = set()
+
+    def reset_counters(self) -> None:
+        """Forget the requests served so far."""
+        self.requests = 0
+        self.bytes_sent = 0
+        self.endpoints.clear()
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/emby/Users", self._handle_users)
+        app.router.add_get("/emby/Users/Query", self._handle_users_query)
+        app.router.add_get("/emby/Users/{user_id}/Items", self._handle_items)
+        app.router.add_get("/emby/Items/Counts", self._handle_counts)
+        app.router.add_get("/emby/Library/MediaFolders", self._handle_media_folders)
+        app.router.add_get("/emby/Items/{item_id}/Images/Primary", self._handle_image)
+        app.router.add_get("/embywebsocket", self._handle_websocket)
+        return app
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.url = f"http://{host}:{self._runner.addresses[0][1]}"
+
+    async def async_stop(self) -> None:
+        for ws in list(self._websockets):
+            await ws.close()
+        await self._runner.cleanup()
+
+    async def __aenter__(self) -> "FakeEmbyServer":
+        await self.async_start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.async_stop()
+
+    async def async_push(self, message_type: str, data) -> None:
+        """Send a notification to every connected websocket client."""
+        for ws in list(self._websockets):
+            await ws.send_json({"MessageType": message_type, "Data": data})
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        token = request.headers.get("X-MediaBrowser-Token") or request.query.get("api_key")
+        if token != API_KEY:
+            return web.Response(status=401)
+        if request.path == "/embywebsocket":
+            return await handler(request)
+        self.requests += 1
+        resource = request.match_info.route.resource
+        self.endpoints[resource.canonical if resource is not None else request.path] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_next > 0 or (self.error_rate and self._rng.random() < self.error_rate):
+            self.fail_next = max(self.fail_next - 1, 0)
+            return web.Response(status=self.error_status)
+        response = await handler(request)
+        self.bytes_sent += len(response.body or b"")
+        return response
+
+    @staticmethod
+    def _json(data) -> web.Response:
+        return web.Response(body=json.dumps(data).encode(), content_type="application/json")
+
+    def _user_dtos(self) -> list[dict]:
+        return [{"Id": user_id, "Name": f"User {user_id}"} for user_id in self.library.user_ids]
+
+    async def _handle_users(self, request: web.Request) -> web.Response:
+        return self._json(self._user_dtos())
+
+    async def _handle_users_query(self, request: web.Request) -> web.Response:
+        users = self._user_dtos()
+        start = int(request.query.get("StartIndex", 0))
+        limit = int(request.query.get("Limit", len(users)))
+        return self._json({"Items": users[start:start + limit], "TotalRecordCount": len(users)})
+
+    async def _handle_media_folders(self, request: web.Request) -> web.Response:
+        return self._json({"Items": [
+            {"Id": TV_LIBRARY_ID, "Name": "TV Shows", "CollectionType": "tvshows"},
+            {"Id": MOVIE_LIBRARY_ID, "Name": "Movies", "CollectionType": "movies"},
+        ]})
+
+    async def _handle_counts(self, request: web.Request) -> web.Response:
+        counts = self.library.type_counts()
+        return self._json({
+            "SeriesCount": counts[SERIES],
+            "MovieCount": counts[MOVIE],
+            "EpisodeCount": counts[EPISODE],
+        })
+
+    async def _handle_image(self, request: web.Request) -> web.Response:
+        if self.library.index_of(request.match_info["item_id"]) is None:
+            return web.Response(status=404)
+        return web.Response(body=self.image, content_type="image/jpeg")
+
+    async def _handle_items(self, request: web.Request) -> web.Response:
+        library = self.library
+        query = request.query
+        user_id = request.match_info["user_id"]
+        if user_id not in library.user_ids:
+            return web.Response(status=404)
+        parent_id = query.get("ParentId")
+        types = tuple(sorted(
+            TYPE_CODES[name] for name in query.get("IncludeItemTypes", ",".join(TYPE_NAMES)).split(",")
+            if name in TYPE_CODES
+        ))
+        sort_by = query.get("SortBy", "SortName")
+        descending = query.get("SortOrder") == "Descending"
+
+        if sort_by == "DateLastContentAdded":
+            indices = library.series_by_last_content(parent_id)
+            descending = False
+        elif since := query.get("MinDateLastSavedForUser"):
+            indices = [
+                index for index in library.user_data_changed(user_id, since, types)
+                if parent_id is None or library.library_of(library.types[index]) == parent_id
+            ]
+        elif "IsPlayed" in query:
+            indices = library.played_query(user_id, parent_id, types, query["IsPlayed"] == "true")
+        else:
+            indices = library.query(parent_id, types)
+        if since := query.get("MinDateLastSaved"):
+            indices = library.saved_since(indices, since)
+
+        total = len(indices)
+        start = int(query.get("StartIndex", 0))
+        limit = int(query.get("Limit", total))
+        if descending:
+            page = [indices[total - 1 - position] for position in range(start, min(start + limit, total))]
+        else:
+            page = indices[start:start + limit]
+
+        fields = set(query.get("Fields", "").split(","))
+        user_data = query.get("EnableUserData") == "true"
+        body = {"Items": [library.dto(index, fields, user_id, user_data) for index in page]}
+        if query.get("EnableTotalRecordCount") != "false":
+            body["TotalRecordCount"] = total
+        return self._json(body)
+
+    async def _handle_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._websockets.add(ws)
+        try:
+            await ws.send_json({"MessageType": "ForceKeepAlive", "Data": 60})
+            async for msg in ws:
+                if msg.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self._websockets.discard(ws)
+        return ws
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of failing requests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8096)
+    args = parser.parse_args()
+    server = FakeEmbyServer(args.items, args.users, args.latency, args.error_rate)
+    print(f"Fake Emby server with {len(server.library)} items, API key {API_KEY}")
+    web.run_app(server.build_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Tests for combining several Emby servers."""
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.emby_stats.aggregate import EmbyAggregateCoordinator
+from custom_components.emby_stats.const import CONF_MEMBERS, DOMAIN
+from custom_components.emby_stats.coordinator import EmbyStatsCoordinator
+
+
+async def test_members_without_coordinator_are_unavailable(hass, emby_client, config_entry) -> None:
+    """Members that are not loaded are listed as unavailable under their title."""
+    offline = MockConfigEntry(domain=DOMAIN, title="Offline Emby", data={})
+    offline.add_to_hass(hass)
+    aggregate_entry = MockConfigEntry(
+        domain=DOMAIN, title="All servers", data={CONF_MEMBERS: [config_entry.entry_id, offline.entry_id]}
+    )
+    aggregate_entry.add_to_hass(hass)
+
+    member = EmbyStatsCoordinator(hass, emby_client, config_entry)
+    await member.async_refresh()
+    hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = member
+
+    aggregate = EmbyAggregateCoordinator(hass, aggregate_entry)
+    for entry_id, coordinator in aggregate.members().items():
+        aggregate.async_attach(entry_id, coordinator)
+    await aggregate.async_refresh()
+
+    assert aggregate.data["total_movies"] == member.data["total_movies"]
+    assert aggregate.data["servers"] == {
+        config_entry.entry_id: {"title": "Fake Emby", "available": True},
+        offline.entry_id: {"title": "Offline Emby", "available": False},
+    }
+
+    # Unloading the last member keeps the sums but flags every server
+    hass.data[DOMAIN].pop(config_entry.entry_id)
+    aggregate.async_detach_member(config_entry.entry_id)
+    assert aggregate.data["total_movies"] == member.data["total_movies"]
+    assert not any(server["available"] for server in aggregate.data["servers"].values())
+
+    # Updates of the detached member are no longer followed
+    member.async_set_updated_data({**member.data, "total_movies": 0})
+    assert aggregate.data["total_movies"] != 0
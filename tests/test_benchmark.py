@@ -0,0 +1,134 @@
+"""Refresh benchmarks against the fake Emby server.
+
+The benchmarks are deselected by default; run them with
+
+    pytest -m benchmark
+
+Every scenario runs twice on a fresh client: first under tracemalloc for the
+peak memory allocated while it runs, then untraced for the wall time. The
+first run also warms up the fake server's query indices. Requests and bytes
+are counted by the server, so retries and failed requests are included. The
+fake server shares the process, so the peak memory includes the responses
+it builds.
+"""
+import asyncio
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+
+import pytest
+
+from custom_components.emby_stats.analytics import EmbyAnalyticsCoordinator
+from custom_components.emby_stats.coordinator import EmbyStatsCoordinator
+from custom_components.emby_stats.emby_api import EmbyApiClient, EmbyItem
+from custom_components.emby_stats.poster_cache import PosterCache
+
+from .fake_emby import API_KEY, MOVIE, FakeEmbyServer
+
+pytestmark = pytest.mark.benchmark
+
+LIBRARIES = {
+    "1k": {"items": 1_000},
+    "10k": {"items": 10_000},
+    "50k": {"items": 50_000},
+    "200k": {"items": 200_000},
+    "10k+20ms": {"items": 10_000, "latency": 0.02},
+    "10k+10%err": {"items": 10_000, "error_rate": 0.1, "seed": 1},
+}
+
+POSTERS = 100
+
+Scenario = Callable[[object, EmbyApiClient, object, FakeEmbyServer], Awaitable[Callable[[], Awaitable]]]
+
+
+async def _full_refresh(hass, client, entry, server):
+    return EmbyStatsCoordinator(hass, client, entry).async_refresh
+
+
+async def _delta_refresh(hass, client, entry, server):
+    coordinator = EmbyStatsCoordinator(hass, client, entry)
+    await coordinator.async_refresh()
+    server.library.add_items(20)
+    return coordinator.async_refresh
+
+
+async def _analytics_scan(hass, client, entry, server):
+    return EmbyAnalyticsCoordinator(hass, client, entry).async_refresh
+
+
+async def _analytics_update(hass, client, entry, server):
+    coordinator = EmbyAnalyticsCoordinator(hass, client, entry)
+    await coordinator.async_refresh()
+    library = server.library
+    for index in range(0, len(library), max(len(library) // 50, 1)):
+        library.set_played(library.user_ids[0], index, not library.played(library.user_ids[0], index))
+    return coordinator.async_refresh
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "full refresh": _full_refresh,
+    "delta refresh": _delta_refresh,
+    "analytics scan": _analytics_scan,
+    "analytics update": _analytics_update,
+}
+
+
+async def _run(hass, entry, server: FakeEmbyServer, scenario: Scenario, traced: bool) -> tuple[float, int]:
+    """Run a scenario on a fresh client; return its wall time and peak traced memory."""
+    client = EmbyApiClient(server.url, API_KEY)
+    try:
+        measured = await scenario(hass, client, entry, server)
+        server.reset_counters()
+        if traced:
+            tracemalloc.start()
+        start = time.perf_counter()
+        await measured()
+        wall = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if traced else 0
+    finally:
+        tracemalloc.stop()
+        await client.async_close()
+    return wall, peak
+
+
+@pytest.mark.parametrize("server_options", list(LIBRARIES.values()), ids=list(LIBRARIES))
+@pytest.mark.parametrize("scenario", list(SCENARIOS.values()), ids=list(SCENARIOS))
+async def test_refresh(hass, request, emby_server, config_entry, scenario, benchmark_report) -> None:
+    """Report wall time, requests, bytes and peak memory of a refresh."""
+    _wall, peak = await _run(hass, config_entry, emby_server, scenario, traced=True)
+    wall, _peak = await _run(hass, config_entry, emby_server, scenario, traced=False)
+    requests, bytes_sent = emby_server.requests, emby_server.bytes_sent
+
+    benchmark_report.append(
+        f"{request.node.callspec.id:<28} {wall:8.3f} s {requests:6d} requests "
+        f"{bytes_sent / 2**20:9.2f} MiB {peak / 2**20:8.2f} MiB peak"
+    )
+
+
+@pytest.mark.parametrize(
+    "server_options",
+    [{"items": POSTERS * 4}, {"items": POSTERS * 4, "latency": 0.05}],
+    ids=["local", "50ms"],
+)
+async def test_poster_downloads(hass, tmp_path, request, emby_server, emby_client, benchmark_report) -> None:
+    """Report how fast the poster cache downloads a batch of posters."""
+    hass.config.config_dir = str(tmp_path)
+    poster_cache = PosterCache(hass, 100 * 2**20)
+    await poster_cache.async_load()
+    library = emby_server.library
+    items = [
+        emby_client.build_latest_item(EmbyItem.from_dto(library.dto(index, set())))
+        for index, code in enumerate(library.types) if code == MOVIE
+    ][:POSTERS]
+
+    start = time.perf_counter()
+    poster_cache.prefetch(emby_client, items)
+    while poster_cache._in_flight:
+        await asyncio.gather(*poster_cache._in_flight.values())
+    wall = time.perf_counter() - start
+
+    assert all(poster_cache.contains(PosterCache.filename(item["id"], item["image_tag"])) for item in items)
+    benchmark_report.append(
+        f"posters[{request.node.callspec.id}]{'':<14} {wall:8.3f} s {len(items) / wall:8.1f} posters/s "
+        f"{emby_server.bytes_sent / 2**20 / wall:8.2f} MiB/s"
+    )
@@ -0,0 +1,19 @@
+"""Tests for the shared client registry."""
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+
+from custom_components.emby_stats.client_registry import async_acquire_client, async_release_client
+from custom_components.emby_stats.const import CLIENTS, DOMAIN
+
+
+async def test_clients_closed_when_home_assistant_closes(hass) -> None:
+    """Clients in use and lingering ones are closed when Home Assistant closes."""
+    in_use = async_acquire_client(hass, "http://emby-a:8096", "key")
+    lingering = async_acquire_client(hass, "http://emby-b:8096", "key")
+    await async_release_client(hass, lingering, linger=True)
+    sessions = [in_use.session, lingering.session]
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+    await hass.async_block_till_done()
+
+    assert all(session.closed for session in sessions)
+    assert CLIENTS not in hass.data[DOMAIN]
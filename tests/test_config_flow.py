@@ -0,0 +1,54 @@
+"""Tests for the Emby Stats config and options flows."""
+from homeassistant.const import CONF_API_KEY, CONF_HOST
+from homeassistant.data_entry_flow import FlowResultType
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.emby_stats.const import (
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_ENABLE_ANALYTICS,
+    CONF_ENABLE_WEBSOCKET,
+    CONF_LOG_TIMINGS,
+    CONF_MAX_PARALLEL_REQUESTS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MOVIE_LIBRARY_ID,
+    CONF_POSTER_CACHE_SIZE,
+    CONF_TV_LIBRARY_ID,
+    CONF_USER_IDS,
+    DOMAIN,
+)
+
+from .fake_emby import API_KEY
+
+OPTIONS = {
+    CONF_MIN_SCAN_INTERVAL: 2,
+    CONF_MAX_SCAN_INTERVAL: 20,
+    CONF_MAX_PARALLEL_REQUESTS: 8,
+    CONF_ENABLE_WEBSOCKET: True,
+    CONF_POSTER_CACHE_SIZE: 100,
+    CONF_COMPACT_ATTRIBUTES: True,
+    CONF_ENABLE_ANALYTICS: True,
+    CONF_LOG_TIMINGS: True,
+}
+
+
+async def test_options_flow_sets_every_option(hass, emby_server, config_entry) -> None:
+    """Every option the integration reads can be changed in the options flow."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={**config_entry.data, CONF_HOST: emby_server.url, CONF_API_KEY: API_KEY},
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] is FlowResultType.FORM
+    assert set(OPTIONS) <= {str(key) for key in result["data_schema"].schema}
+
+    result = await hass.config_entries.options.async_configure(result["flow_id"], {
+        CONF_USER_IDS: entry.data[CONF_USER_IDS],
+        CONF_TV_LIBRARY_ID: entry.data[CONF_TV_LIBRARY_ID],
+        CONF_MOVIE_LIBRARY_ID: entry.data[CONF_MOVIE_LIBRARY_ID],
+        **OPTIONS,
+    })
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert entry.options == OPTIONS
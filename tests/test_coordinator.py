@@ -0,0 +1,172 @@
+"""Tests for the Emby Stats coordinators against the fake Emby server."""
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.emby_stats.analytics import EmbyAnalyticsCoordinator
+from custom_components.emby_stats.coordinator import EmbyStatsCoordinator
+from custom_components.emby_stats.emby_api import EmbyApiError
+
+from .fake_emby import EPISODE, MOVIE, SERIES
+
+
+@pytest.fixture
+def server_options() -> dict:
+    return {"items": 2000, "users": 2}
+
+
+async def test_full_refresh(hass, emby_server, emby_client, config_entry) -> None:
+    """A full refresh reports the library totals and the newest items."""
+    coordinator = EmbyStatsCoordinator(hass, emby_client, config_entry)
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    counts = Counter(emby_server.library.types)
+    data = coordinator.data
+    assert data["total_movies"] == counts[MOVIE]
+    assert data["total_tvshows"] == counts[SERIES]
+    assert data["total_episodes"] == counts[EPISODE]
+    assert set(data["users"]) == {"user0", "user1"}
+
+    library = emby_server.library
+    newest_movie = max(index for index, code in enumerate(library.types) if code == MOVIE)
+    assert data["last_movies_data"][0]["id"] == library.item_id(newest_movie)
+    dates = [item["date_added"] for item in data["last_updated_tvshows_data"]]
+    assert dates == sorted(dates, reverse=True)
+    assert coordinator.last_refresh_timings
+
+
+async def test_delta_refresh_adds_new_items(hass, emby_server, emby_client, config_entry) -> None:
+    """Items added after a full refresh are merged in by a delta refresh."""
+    coordinator = EmbyStatsCoordinator(hass, emby_client, config_entry)
+    await coordinator.async_refresh()
+    movies = coordinator.data["total_movies"]
+
+    library = emby_server.library
+    added = [index for index in library.add_items(10) if library.types[index] == MOVIE]
+    emby_server.reset_counters()
+    await coordinator.async_refresh()
+
+    assert coordinator.data["total_movies"] == movies + len(added)
+    assert coordinator.data["last_movies_data"][0]["id"] == library.item_id(added[-1])
+    assert emby_server.endpoints["/emby/Users/{user_id}/Items"] >= 2
+
+
+async def test_delta_refresh_updates_resaved_items(hass, emby_server, emby_client, config_entry) -> None:
+    """An item saved again after it was listed shows its new title and poster."""
+    coordinator = EmbyStatsCoordinator(hass, emby_client, config_entry)
+    await coordinator.async_refresh()
+    newest = coordinator.data["last_movies_data"][0]
+
+    library = emby_server.library
+    library.resave(library.index_of(newest["id"]), "Real Title")
+    await coordinator.async_refresh()
+
+    latest = coordinator.data["last_movies_data"][0]
+    assert latest["id"] == newest["id"]
+    assert latest["title"] == "Real Title"
+    assert latest["image_tag"] != newest["image_tag"]
+
+    # Saved once more, the item is still picked up after the mark moved to it
+    library.resave(library.index_of(newest["id"]), "Final Title")
+    await coordinator.async_refresh()
+    assert coordinator.data["last_movies_data"][0]["title"] == "Final Title"
+
+
+async def test_transient_errors_serve_stale_data(hass, emby_server, emby_client, config_entry) -> None:
+    """While the server fails, the last good data stays available, marked stale."""
+    coordinator = EmbyStatsCoordinator(hass, emby_client, config_entry)
+    await coordinator.async_refresh()
+    total_movies = coordinator.data["total_movies"]
+
+    emby_server.error_rate = 1.0
+    with patch("custom_components.emby_stats.emby_api.REQUEST_BACKOFF", 0):
+        await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.data["stale_since"]
+    assert coordinator.data["total_movies"] == total_movies
+
+    emby_server.error_rate = 0.0
+    emby_client.breaker.record_success()
+    await coordinator.async_refresh()
+    assert "stale_since" not in coordinator.data
+
+
+async def test_analytics_scan_and_update(hass, emby_server, emby_client, config_entry) -> None:
+    """The analytics index covers every movie and episode and follows played changes."""
+    coordinator = EmbyAnalyticsCoordinator(hass, emby_client, config_entry)
+    await coordinator.async_refresh()
+
+    library = emby_server.library
+    counts = Counter(library.types)
+    assert coordinator.data["item_count"] == counts[MOVIE] + counts[EPISODE]
+    watched = coordinator.data["watched_hours"]["user0"]
+
+    movie = next(index for index, code in enumerate(library.types) if code == MOVIE)
+    library.set_played("user0", movie, not library.played("user0", movie))
+    await coordinator.async_refresh()
+    assert coordinator.data["watched_hours"]["user0"] != watched
+
+
+async def test_analytics_reconciles_without_rescan(hass, emby_server, emby_client, config_entry) -> None:
+    """Missed deletions and items added during a run are fixed without a rescan."""
+    coordinator = EmbyAnalyticsCoordinator(hass, emby_client, config_entry)
+    await coordinator.async_refresh()
+
+    library = emby_server.library
+    for index in [index for index, code in enumerate(library.types) if code == EPISODE][:3]:
+        library.remove(index)
+    get_library_count = emby_client.get_library_count
+
+    async def count_after_adding(*args, **kwargs):
+        if len(library.types) < 2010:
+            library.add_items(10)
+        return await get_library_count(*args, **kwargs)
+
+    with (
+        patch.object(emby_client, "get_library_count", count_after_adding),
+        patch.object(coordinator, "_async_full_scan") as full_scan,
+    ):
+        await coordinator.async_refresh()
+    full_scan.assert_not_called()
+    counts = library.type_counts()
+    assert coordinator.data["item_count"] == counts[MOVIE] + counts[EPISODE]
+    assert len(coordinator.index) == coordinator.data["item_count"]
+
+
+async def test_analytics_saves_only_changes(hass, emby_server, emby_client, config_entry) -> None:
+    """The index is only saved again after it changed."""
+    coordinator = EmbyAnalyticsCoordinator(hass, emby_client, config_entry)
+    with patch.object(coordinator._store, "async_delay_save") as delay_save:
+        await coordinator.async_refresh()
+        assert delay_save.call_count == 1
+
+        await coordinator.async_refresh()
+        assert delay_save.call_count == 1
+
+        library = emby_server.library
+        movie = next(index for index, code in enumerate(library.types) if code == MOVIE)
+        library.set_played("user0", movie, not library.played("user0", movie))
+        await coordinator.async_refresh()
+        assert delay_save.call_count == 2
+
+
+async def test_failed_sub_query_without_previous_value(hass, emby_server, emby_client, config_entry) -> None:
+    """A failed sub-query fails the first refresh instead of reporting zeros."""
+    coordinator = EmbyStatsCoordinator(hass, emby_client, config_entry)
+    error = EmbyApiError("Emby request failed", transient=True)
+    with patch.object(emby_client, "get_latest_items", side_effect=error):
+        await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    assert coordinator.data is None
+
+    await coordinator.async_refresh()
+    totals = {key: coordinator.data[key] for key in ("total_movies", "total_episodes")}
+
+    # Later failures keep the previous value and force another full refresh
+    with patch.object(emby_client, "get_unwatched_count", side_effect=error):
+        await coordinator._async_full_refresh()
+    assert coordinator._last_full_refresh is None
+    assert {key: coordinator.data[key] for key in totals} == totals
@@ -0,0 +1,13 @@
+"""Tests for the Emby API client."""
+from .fake_emby import MOVIE_LIBRARY_ID
+
+
+async def test_uncached_requests_do_not_count_as_misses(emby_server, emby_client) -> None:
+    """The hit ratio only covers requests that read the response cache."""
+    user_id = emby_server.library.user_ids[0]
+    for _ in range(2):
+        await emby_client.get_library_count(user_id, MOVIE_LIBRARY_ID, "Movie")
+    await emby_client.get_library_count(user_id, MOVIE_LIBRARY_ID, "Movie", use_cache=False)
+
+    assert (emby_client.cache_hits, emby_client.cache_misses) == (1, 1)
+    assert emby_client.cache_hit_ratio == 0.5
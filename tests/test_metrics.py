@@ -0,0 +1,55 @@
+"""Tests for the request instrumentation."""
+import asyncio
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.emby_stats.const import CONF_USER_ID, CONF_USER_IDS
+from custom_components.emby_stats.coordinator import EmbyStatsCoordinator
+from custom_components.emby_stats.metrics import ClientMetrics, collect_timings
+
+
+@pytest.fixture
+def server_options() -> dict:
+    return {"items": 1000, "users": 2}
+
+
+def test_collect_timings() -> None:
+    """Only requests recorded within the block are collected."""
+    metrics = ClientMetrics()
+    metrics.record("Items", 0.5)
+    with collect_timings() as timings:
+        metrics.record("Items", 0.25)
+        metrics.record("Items", 0.25, error=True)
+        metrics.record("Users", 0.1)
+    metrics.record("Users", 0.1)
+
+    assert timings == {"Items": [2, 0.5], "Users": [1, 0.1]}
+    assert metrics.endpoints["Items"].requests == 3
+
+
+async def test_refresh_timings_of_a_shared_client(hass, emby_server, emby_client, config_entry) -> None:
+    """Entries sharing a client only see the requests of their own refreshes."""
+    other_entry = MockConfigEntry(
+        domain=config_entry.domain, data={**config_entry.data, CONF_USER_ID: "user1", CONF_USER_IDS: ["user1"]}
+    )
+    other_entry.add_to_hass(hass)
+    first = EmbyStatsCoordinator(hass, emby_client, config_entry)
+    second = EmbyStatsCoordinator(hass, emby_client, other_entry)
+
+    await asyncio.gather(first.async_refresh(), second.async_refresh())
+
+    def requests(coordinator) -> int:
+        return sum(count for count, _seconds in coordinator.last_refresh_timings.values())
+
+    # Every request is attributed to exactly one refresh
+    assert requests(first) and requests(second)
+    assert requests(first) + requests(second) == emby_server.requests
+    total = sum(stats.requests for stats in emby_client.metrics.endpoints.values())
+    assert total == emby_server.requests
+
+    timings = first.last_refresh_timings
+    emby_server.reset_counters()
+    await second.async_refresh()
+    assert first.last_refresh_timings == timings
+    assert requests(second) == emby_server.requests
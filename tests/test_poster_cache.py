@@ -0,0 +1,62 @@
+"""Tests for the poster cache."""
+import asyncio
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.emby_stats import _async_get_poster_cache, _async_update_poster_quota
+from custom_components.emby_stats.const import CONF_POSTER_CACHE_SIZE, DOMAIN
+from custom_components.emby_stats.coordinator import EmbyStatsCoordinator
+from custom_components.emby_stats.poster_cache import PosterCache
+
+
+async def _async_wait(poster_cache: PosterCache) -> None:
+    while poster_cache._in_flight:
+        await asyncio.gather(*poster_cache._in_flight.values())
+
+
+async def test_failed_posters_are_not_requested_again(hass, tmp_path, emby_server, emby_client) -> None:
+    """A missing poster is requested once, not retried and not queued on the next refresh."""
+    hass.config.config_dir = str(tmp_path)
+    poster_cache = PosterCache(hass, 2**20)
+    await poster_cache.async_load()
+    item = {
+        "id": "missing",
+        "image_tag": "tag",
+        "image_url_original": f"{emby_server.url}/emby/Items/missing/Images/Primary?tag=tag",
+    }
+
+    poster_cache.prefetch(emby_client, [item])
+    await _async_wait(poster_cache)
+    assert emby_server.requests == 1
+
+    poster_cache.prefetch(emby_client, [item])
+    assert not poster_cache._in_flight
+
+    # Once the failure expired the poster is tried again
+    poster_cache._failed = dict.fromkeys(poster_cache._failed, 0.0)
+    poster_cache.prefetch(emby_client, [item])
+    await _async_wait(poster_cache)
+    assert emby_server.requests == 2
+
+
+async def test_quota_follows_loaded_entries(hass, tmp_path, emby_client, config_entry) -> None:
+    """The shared quota is the largest of the loaded entries and shrinks when one unloads."""
+    hass.config.config_dir = str(tmp_path)
+    large = MockConfigEntry(domain=DOMAIN, data=config_entry.data, options={CONF_POSTER_CACHE_SIZE: 3})
+    small = MockConfigEntry(domain=DOMAIN, data=config_entry.data, options={CONF_POSTER_CACHE_SIZE: 1})
+    large.add_to_hass(hass)
+    small.add_to_hass(hass)
+
+    poster_cache = await _async_get_poster_cache(hass, large)
+    hass.data[DOMAIN][large.entry_id] = EmbyStatsCoordinator(hass, emby_client, large, poster_cache)
+    for number in range(3):
+        poster_cache._add(f"item{number}_tag.jpg", 2**20)
+    assert await _async_get_poster_cache(hass, small) is poster_cache
+    hass.data[DOMAIN][small.entry_id] = EmbyStatsCoordinator(hass, emby_client, small, poster_cache)
+    assert poster_cache.max_bytes == 3 * 2**20
+    assert len(poster_cache._index) == 3
+
+    hass.data[DOMAIN].pop(large.entry_id)
+    await _async_update_poster_quota(hass)
+    assert poster_cache.max_bytes == 2**20
+    assert list(poster_cache._index) == ["item2_tag.jpg"]
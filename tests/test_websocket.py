@@ -0,0 +1,184 @@
+"""Tests for the Emby websocket listener."""
+import asyncio
+import json
+from datetime import timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from aiohttp import WSMsgType, web
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from custom_components.emby_stats.const import (
+    CONF_ENABLE_WEBSOCKET,
+    CONF_MOVIE_LIBRARY_ID,
+    CONF_TV_LIBRARY_ID,
+    CONF_USER_ID,
+    DOMAIN,
+    WEBSOCKET_DEBOUNCE,
+)
+from custom_components.emby_stats.coordinator import EmbyStatsCoordinator
+from custom_components.emby_stats.emby_api import EmbyApiClient
+from custom_components.emby_stats.websocket import EmbyWebSocketListener, keepalive_interval
+
+
+class FakeWebSocketServer:
+    """Emby websocket endpoint that plays one script of messages per connection.
+
+    A script ending in ``None`` closes the connection after sending; otherwise
+    the connection stays open until the test ends.
+    """
+
+    def __init__(self, *scripts: list):
+        self.scripts = list(scripts)
+        self.connections = 0
+        self.received = []
+        self.url = None
+        self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        script = self.scripts[self.connections] if self.connections < len(self.scripts) else []
+        self.connections += 1
+        for message in script:
+            if message is None:
+                await ws.close()
+                return ws
+            await ws.send_str(message if isinstance(message, str) else json.dumps(message))
+        async for msg in ws:
+            if msg.type == WSMsgType.TEXT:
+                self.received.append(json.loads(msg.data))
+        return ws
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/embywebsocket", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._runner.cleanup()
+
+
+async def _wait_for(predicate, timeout: float = 5) -> None:
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize(
+    ("timeout", "expected"),
+    [(60, 30), ("90", 45), (4, 5), (None, 30), ("soon", 30), (0, 30), (float("nan"), 30)],
+)
+def test_keepalive_interval(timeout, expected) -> None:
+    """Malformed ForceKeepAlive timeouts fall back to Emby's default."""
+    assert keepalive_interval(timeout) == expected
+
+
+async def test_reconnects_after_unexpected_errors(hass, socket_enabled) -> None:
+    """Unexpected errors end a connection, never the reconnect loop."""
+    async with FakeWebSocketServer(
+        [
+            {"MessageType": "ForceKeepAlive", "Data": "soon"},
+            "[1, 2]",
+            {"MessageType": "LibraryChanged", "Data": {"ItemsAdded": ["1"]}},
+            None,
+        ],
+        [
+            {"MessageType": "ForceKeepAlive", "Data": 60},
+            {"MessageType": "LibraryChanged", "Data": {"ItemsAdded": ["2"]}},
+            {"MessageType": "UserDataChanged", "Data": {"UserId": "u1"}},
+        ],
+    ) as server:
+        client = EmbyApiClient(server.url, "key")
+        real_connect = client.async_ws_connect
+        connect_errors = [RuntimeError("boom")]
+
+        async def connect():
+            if connect_errors:
+                raise connect_errors.pop()
+            return await real_connect()
+
+        messages = []
+        connection_changes = []
+
+        def on_message(message_type: str, data: dict) -> None:
+            if data.get("ItemsAdded") == ["2"]:
+                raise ValueError("handler failed")
+            messages.append((message_type, data))
+
+        listener = EmbyWebSocketListener(client, on_message, connection_changes.append)
+        with (
+            patch.object(client, "async_ws_connect", connect),
+            patch("custom_components.emby_stats.websocket.WEBSOCKET_BACKOFF_MIN", 0),
+        ):
+            listener.start(hass)
+            await _wait_for(lambda: len(messages) == 2)
+            await _wait_for(lambda: {"MessageType": "KeepAlive"} in server.received)
+
+            assert server.connections == 2
+            assert listener.connected
+            assert messages == [
+                ("LibraryChanged", {"ItemsAdded": ["1"]}),
+                ("UserDataChanged", {"UserId": "u1"}),
+            ]
+            assert connection_changes == [True, False, True]
+
+            await listener.async_stop()
+        await client.async_close()
+
+    assert not listener.connected
+    assert connection_changes == [True, False, True, False]
+
+
+def _user_data(user_id: str, item_id: str, played: bool, position: int = 0) -> dict:
+    return {
+        "MessageType": "UserDataChanged",
+        "Data": {
+            "UserId": user_id,
+            "UserDataList": [{"ItemId": item_id, "Played": played, "PlaybackPositionTicks": position}],
+        },
+    }
+
+
+async def test_pushed_changes_are_debounced(hass, socket_enabled) -> None:
+    """A burst of change notifications results in a single refresh."""
+    async with FakeWebSocketServer(
+        [
+            _user_data("u1", "a", played=True),
+            _user_data("u1", "a", played=True, position=1000),
+            _user_data("u1", "b", played=False, position=5000),
+            _user_data("other", "c", played=True),
+            {"MessageType": "LibraryChanged", "Data": {"ItemsAdded": ["1"]}},
+        ],
+    ) as server:
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_USER_ID: "u1", CONF_TV_LIBRARY_ID: "tv", CONF_MOVIE_LIBRARY_ID: "movies"},
+            options={CONF_ENABLE_WEBSOCKET: True},
+        )
+        entry.add_to_hass(hass)
+        client = EmbyApiClient(server.url, "key")
+        client.invalidate_cache = Mock()
+        coordinator = EmbyStatsCoordinator(hass, client, entry)
+        coordinator._async_update_data = AsyncMock(return_value={})
+
+        coordinator.async_start_push()
+        # Only the played change and the library change touch the shared cache
+        await _wait_for(lambda: client.invalidate_cache.call_count == 2)
+        await hass.async_block_till_done()
+        assert coordinator._async_update_data.call_count == 0
+        assert coordinator._changed_users == {"u1"}
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=WEBSOCKET_DEBOUNCE + 1))
+        await hass.async_block_till_done()
+        assert coordinator._async_update_data.call_count == 1
+
+        await coordinator.async_stop_push()
+        await client.async_close()